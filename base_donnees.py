@@ -0,0 +1,133 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Chemin de la base (surchargeable par variable d'environnement pour les déploiements)
+CHEMIN_BASE = os.environ.get("LECTURE_DB", "lecture.db")
+
+# Temps d'attente maximal quand un autre processus tient le verrou d'écriture
+DELAI_ATTENTE_MS = 5000
+
+# Nombre maximal de connexions de lecture conservées dans le pool
+TAILLE_POOL_LECTURE = 8
+
+_verrou_pool = threading.Lock()
+_verrou_ecriture = threading.Lock()
+_pool_lecture = queue.LifoQueue(maxsize=TAILLE_POOL_LECTURE)
+_connexion_ecriture = None
+_pid = os.getpid()
+_local = threading.local()
+
+
+def configurer_connexion(conn):
+    """Applique les réglages communs à toute connexion sur lecture.db.
+
+    Le mode WAL permet aux lecteurs de ne jamais bloquer l'écrivain (et
+    inversement), y compris entre plusieurs processus serveur Streamlit.
+    Le busy_timeout fait patienter SQLite au lieu de lever « database is locked ».
+    """
+    conn.execute(f"PRAGMA busy_timeout = {DELAI_ATTENTE_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def ouvrir_connexion(chemin=None):
+    """Ouvre une connexion configurée (autocommit, transactions explicites)."""
+    conn = sqlite3.connect(
+        chemin or CHEMIN_BASE,
+        timeout=DELAI_ATTENTE_MS / 1000,
+        check_same_thread=False,
+        isolation_level=None
+    )
+    return configurer_connexion(conn)
+
+
+def _verifier_processus():
+    """Réinitialise les connexions héritées après un fork.
+
+    Une connexion SQLite ne doit jamais être partagée entre processus : si le
+    serveur a été forké, on repart de pools vides dans le processus enfant.
+    """
+    global _pid, _pool_lecture, _connexion_ecriture, _verrou_ecriture, _local
+    if os.getpid() == _pid:
+        return
+    with _verrou_pool:
+        if os.getpid() == _pid:
+            return
+        _pid = os.getpid()
+        _pool_lecture = queue.LifoQueue(maxsize=TAILLE_POOL_LECTURE)
+        _connexion_ecriture = None
+        _verrou_ecriture = threading.Lock()
+        _local = threading.local()
+
+
+@contextmanager
+def connexion_lecture():
+    """Prête une connexion de lecture au thread courant.
+
+    La connexion est empruntée au pool pour la durée du bloc puis rendue,
+    ce qui évite de rouvrir lecture.db à chaque rerun Streamlit. Les appels
+    imbriqués dans un même thread réutilisent la même connexion.
+    """
+    _verifier_processus()
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+
+    try:
+        conn = _pool_lecture.get_nowait()
+    except queue.Empty:
+        conn = ouvrir_connexion()
+
+    _local.conn = conn
+    try:
+        yield conn
+    finally:
+        _local.conn = None
+        try:
+            _pool_lecture.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def connexion_ecriture():
+    """Fournit l'unique connexion d'écriture du processus, dans une transaction.
+
+    Les écritures du processus sont sérialisées par un verrou ; entre processus,
+    BEGIN IMMEDIATE prend le verrou d'écriture SQLite dès le début de la
+    transaction (avec busy_timeout) pour éviter les interblocages lecteur/écrivain.
+    La transaction est validée à la sortie du bloc, annulée en cas d'exception.
+    """
+    global _connexion_ecriture
+    _verifier_processus()
+    with _verrou_ecriture:
+        if _connexion_ecriture is None:
+            _connexion_ecriture = ouvrir_connexion()
+        conn = _connexion_ecriture
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+
+def fermer_connexions():
+    """Ferme toutes les connexions ouvertes (arrêt du serveur, tests)."""
+    global _connexion_ecriture
+    with _verrou_ecriture:
+        if _connexion_ecriture is not None:
+            _connexion_ecriture.close()
+            _connexion_ecriture = None
+    while True:
+        try:
+            _pool_lecture.get_nowait().close()
+        except queue.Empty:
+            break
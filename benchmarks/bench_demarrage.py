@@ -0,0 +1,91 @@
+"""Mesure le coût des imports au démarrage de l'application.
+
+    python benchmarks/bench_demarrage.py [module ...]
+
+Chaque mesure se fait dans un nouveau processus Python, avec
+« python -X importtime » : temps cumulé des imports, modules les plus chers
+et mémoire maximale du processus. Sans argument, les modules importés par
+app.py sont mesurés (ceux qui ne sont pas installés sont signalés et
+ignorés), puis les mêmes avec openai, importé seulement à la première
+génération.
+"""
+import ast
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules les plus chers affichés
+NB_AFFICHES = 12
+
+# Importe les modules puis affiche la mémoire maximale du processus (Ko sous Linux)
+PROGRAMME = """
+import resource
+{imports}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def modules_de_l_application():
+    """Modules importés au niveau module par app.py (pas ceux importés dans les fonctions)."""
+    with open(os.path.join(RACINE, "app.py"), encoding="utf-8") as f:
+        arbre = ast.parse(f.read())
+    modules = []
+    for noeud in arbre.body:
+        if isinstance(noeud, ast.Import):
+            modules.extend(alias.name for alias in noeud.names)
+        elif isinstance(noeud, ast.ImportFrom) and noeud.level == 0:
+            modules.append(noeud.module)
+    return list(dict.fromkeys(modules))
+
+
+def installe(module):
+    resultat = subprocess.run([sys.executable, "-c", f"import {module}"], cwd=RACINE, capture_output=True)
+    return resultat.returncode == 0
+
+
+def mesurer(modules):
+    """Importe modules avec -X importtime ; renvoie (mémoire en Ko, {module: (propre, cumulé)} en µs)."""
+    programme = PROGRAMME.format(imports="\n".join(f"import {module}" for module in modules))
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", programme],
+        cwd=RACINE, capture_output=True, text=True, check=True,
+    )
+    temps = {}
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        propre, cumule, nom = ligne[len("import time:"):].split("|")
+        # Les modules de premier niveau sont ceux sans indentation
+        if nom.strip() and nom.startswith(" ") and not nom.startswith("  "):
+            temps[nom.strip()] = (int(propre), int(cumule))
+    return int(resultat.stdout.split()[-1]), temps
+
+
+def afficher(titre, modules):
+    memoire, temps = mesurer(modules)
+    total = sum(cumule for _, cumule in temps.values())
+    print(f"{titre} : {total / 1000:.0f} ms d'imports, {memoire / 1024:.0f} Mo au maximum")
+    for nom, (_, cumule) in sorted(temps.items(), key=lambda t: -t[1][1])[:NB_AFFICHES]:
+        print(f"    {cumule / 1000:8.1f} ms  {nom}")
+    print()
+    return total, memoire
+
+
+def main():
+    modules = sys.argv[1:] or modules_de_l_application()
+    absents = [module for module in modules if not installe(module)]
+    if absents:
+        print(f"Non installés, ignorés : {', '.join(absents)}\n")
+    modules = [module for module in modules if module not in absents]
+
+    total, memoire = afficher("Démarrage", modules)
+    if not sys.argv[1:] and installe("openai"):
+        total_ia, memoire_ia = afficher("Après la première génération", modules + ["openai"])
+        print(f"Évités au démarrage : {(total_ia - total) / 1000:.0f} ms et "
+              f"{(memoire_ia - memoire) / 1024:.0f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare le coût du filtrage de mots interdits selon la taille du lexique.
+
+    python benchmarks/bench_moderation.py
+
+Ancienne méthode : une recherche re.search par mot de la liste.
+Nouvelle méthode : un seul passage d'une expression compilée en arbre de préfixes.
+"""
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moderation import Detecteur, lexique_courant  # noqa: E402
+
+TEXTE = (
+    "Aujourd'hui, je vais au parc avec papa. Il y a un toboggan et des canards. "
+    "Je glisse, c'est amusant ! Après, je fais de la balançoire et papa me pousse. "
+) * 40
+
+
+def lexique(taille):
+    """Lexique de data/lexique.json complété par des mots aléatoires jusqu'à taille."""
+    rng = random.Random(taille)
+    mots = list(lexique_courant().detecteur.mots)
+    while len(mots) < taille:
+        mots.append("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return mots
+
+
+def ancienne_methode(mots, texte):
+    texte_lower = texte.lower()
+    for mot in mots:
+        if re.search(r"\b" + re.escape(mot) + r"\b", texte_lower):
+            return True
+    return False
+
+
+def mesurer(fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return (time.perf_counter() - debut) / repetitions * 1000
+
+
+def main():
+    print(f"Texte de {len(TEXTE.split())} mots, sans mot interdit (pire cas : tout est parcouru)\n")
+    print(f"{'mots':>7} | {'ancienne (ms)':>13} | {'compilée (ms)':>13} | {'compilation (ms)':>16}")
+    print("-" * 60)
+    for taille in (40, 400, 4000, 20000):
+        mots = lexique(taille)
+        debut = time.perf_counter()
+        detecteur = Detecteur(mots)
+        compilation = (time.perf_counter() - debut) * 1000
+        assert not detecteur.contient(TEXTE)
+        ancienne = mesurer(lambda: ancienne_methode(mots, TEXTE), 3 if taille > 1000 else 20)
+        compilee = mesurer(lambda: detecteur.contient(TEXTE), 50)
+        print(f"{taille:>7} | {ancienne:>13.2f} | {compilee:>13.2f} | {compilation:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
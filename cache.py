@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+_ABSENT = object()
+
+
+class CacheLRU:
+    """Cache LRU borné, partagé entre threads (donc entre sessions Streamlit).
+
+    Les valeurs stockées doivent être immuables : elles sont rendues telles
+    quelles à toutes les sessions.
+    """
+
+    def __init__(self, capacite):
+        self.capacite = capacite
+        self._donnees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            valeur = self._donnees.get(cle, _ABSENT)
+            if valeur is _ABSENT:
+                self.echecs += 1
+                return defaut
+            self._donnees.move_to_end(cle)
+            self.succes += 1
+            return valeur
+
+    def set(self, cle, valeur):
+        with self._verrou:
+            self._donnees[cle] = valeur
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.capacite:
+                self._donnees.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._donnees.clear()
+
+    def __len__(self):
+        return len(self._donnees)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from base_donnees import connexion_ecriture, connexion_lecture
+from cache import CacheLRU
+from exercices import questions_depuis_json, questions_vers_json
+from metriques import METRIQUES
+from moderation import contient_mot_interdit
+
+logger = logging.getLogger(__name__)
+
+# Durée de validité d'un texte généré (secondes)
+DUREE_VIE = 7 * 24 * 3600
+
+# Nombre maximal de textes conservés dans la table generations
+TAILLE_MAX = 5000
+
+# Textes gardés en mémoire, devant la table
+TAILLE_MEMOIRE = 256
+
+# Les textes expirés ou en trop sont supprimés toutes les N écritures
+INTERVALLE_EVICTION = 50
+
+_ESPACES = re.compile(r"\s+")
+_PONCTUATION_FINALE = re.compile(r"[\s.!?…]+$")
+
+
+@dataclass(frozen=True)
+class TexteGenere:
+    texte: str
+    nb_mots: int
+    cree_le: float
+    qcm: tuple = ()
+    questions_ouvertes: tuple = ()
+
+    @classmethod
+    def depuis_ligne(cls, texte, nb_mots, cree_le, questions):
+        return cls(texte, nb_mots, cree_le, *questions_depuis_json(questions))
+
+
+def normaliser_demande(demande):
+    """Forme canonique d'une demande : « Un chat  dans l’espace ! » et
+    « un chat dans l'espace » donnent la même clé."""
+    demande = _ESPACES.sub(" ", demande.lower().replace("’", "'")).strip()
+    return _PONCTUATION_FINALE.sub("", demande)
+
+
+def cle_generation(age_range, mode, user_input, existing_text, modele):
+    """Clé du cache : tranche d'âge, mode, demande normalisée, texte modifié (empreinte) et modèle."""
+    source = hashlib.sha256(existing_text.encode("utf-8")).hexdigest() if existing_text else ""
+    cle = json.dumps([age_range, mode, normaliser_demande(user_input), source, modele], ensure_ascii=False)
+    return hashlib.sha256(cle.encode("utf-8")).hexdigest()
+
+
+class CacheGenerations:
+    """Cache des textes générés : table generations, avec un petit cache mémoire devant.
+
+    Les textes expirent après duree_vie secondes ; au-delà de taille_max, les
+    moins récemment utilisés sont supprimés. Un texte relu est revérifié par
+    la modération (le lexique a pu changer depuis sa génération). Une erreur
+    de la base n'empêche jamais une génération : elle compte comme un échec
+    du cache.
+    """
+
+    def __init__(self, duree_vie=DUREE_VIE, taille_max=TAILLE_MAX, taille_memoire=TAILLE_MEMOIRE):
+        self.duree_vie = duree_vie
+        self.taille_max = taille_max
+        self._memoire = CacheLRU(taille_memoire)
+        self._verrou = threading.Lock()
+        self._ecritures = 0
+
+    def _valide(self, entree, maintenant):
+        return entree.cree_le > maintenant - self.duree_vie and not contient_mot_interdit(entree.texte)
+
+    def lire(self, cle):
+        """Renvoie le TexteGenere de cette clé, ou None."""
+        maintenant = time.time()
+        entree = self._memoire.get(cle)
+        if entree is not None and self._valide(entree, maintenant):
+            METRIQUES.incrementer("cache_generations.succes_memoire")
+            return entree
+
+        try:
+            with connexion_lecture() as conn:
+                ligne = conn.execute(
+                    "SELECT texte, nb_mots, cree_le, questions FROM generations WHERE cle = ?", (cle,)
+                ).fetchone()
+            entree = TexteGenere.depuis_ligne(*ligne) if ligne else None
+            if entree is not None and not self._valide(entree, maintenant):
+                self.oublier(cle)
+                entree = None
+            if entree is not None:
+                with connexion_ecriture() as conn:
+                    conn.execute("UPDATE generations SET utilise_le = ? WHERE cle = ?", (maintenant, cle))
+        except sqlite3.Error:
+            logger.exception("Lecture du cache des générations impossible")
+            entree = None
+
+        if entree is None:
+            METRIQUES.incrementer("cache_generations.echecs")
+            return None
+        self._memoire.set(cle, entree)
+        METRIQUES.incrementer("cache_generations.succes_base")
+        return entree
+
+    def au_hasard(self, age_range, mode):
+        """Un texte encore valide déjà généré pour cet âge et ce mode, ou None."""
+        try:
+            with connexion_lecture() as conn:
+                lignes = conn.execute(
+                    """SELECT texte, nb_mots, cree_le, questions FROM generations
+                       WHERE age = ? AND mode = ? AND cree_le > ?
+                       ORDER BY RANDOM() LIMIT 5""",
+                    (age_range, mode, time.time() - self.duree_vie)
+                ).fetchall()
+        except sqlite3.Error:
+            logger.exception("Lecture du cache des générations impossible")
+            return None
+        return next((TexteGenere.depuis_ligne(*ligne) for ligne in lignes if not contient_mot_interdit(ligne[0])), None)
+
+    def enregistrer(self, cle, age_range, mode, modele, texte, nb_mots, qcm=(), questions_ouvertes=()):
+        maintenant = time.time()
+        entree = TexteGenere(texte, nb_mots, maintenant, tuple(qcm), tuple(questions_ouvertes))
+        self._memoire.set(cle, entree)
+        try:
+            with connexion_ecriture() as conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO generations
+                           (cle, age, mode, modele, texte, nb_mots, cree_le, utilise_le, questions)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (cle, age_range, mode, modele, texte, nb_mots, maintenant, maintenant,
+                     questions_vers_json(qcm, questions_ouvertes))
+                )
+            with self._verrou:
+                self._ecritures += 1
+                evincer = self._ecritures % INTERVALLE_EVICTION == 0
+            if evincer:
+                self.evincer()
+        except sqlite3.Error:
+            logger.exception("Écriture dans le cache des générations impossible")
+
+    def evincer(self):
+        """Supprime les textes expirés, puis les moins récemment utilisés au-delà de taille_max."""
+        with connexion_ecriture() as conn:
+            expires = conn.execute(
+                "DELETE FROM generations WHERE cree_le <= ?", (time.time() - self.duree_vie,)
+            ).rowcount
+            en_trop = conn.execute(
+                """DELETE FROM generations WHERE cle IN (
+                       SELECT cle FROM generations ORDER BY utilise_le DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.taille_max,)
+            ).rowcount
+        if expires or en_trop:
+            logger.info("Cache des générations : %d textes expirés et %d en trop supprimés", expires, en_trop)
+
+    def oublier(self, cle):
+        with connexion_ecriture() as conn:
+            conn.execute("DELETE FROM generations WHERE cle = ?", (cle,))
+
+    def vider_memoire(self):
+        self._memoire.vider()
+
+    def statistiques(self):
+        """Compteurs de succès (mémoire, base) et d'échecs du cache."""
+        return {
+            nom: METRIQUES.compteur(f"cache_generations.{nom}")
+            for nom in ("succes_memoire", "succes_base", "echecs")
+        }
+
+
+_cache = CacheGenerations()
+
+
+def lire_generation(cle):
+    """Texte déjà généré pour cette clé (voir cle_generation), ou None."""
+    return _cache.lire(cle)
+
+
+def generation_au_hasard(age_range, mode):
+    """Un texte déjà généré pour cet âge et ce mode (remplacement quand l'IA est indisponible)."""
+    return _cache.au_hasard(age_range, mode)
+
+
+def enregistrer_generation(cle, age_range, mode, modele, texte, nb_mots, qcm=(), questions_ouvertes=()):
+    _cache.enregistrer(cle, age_range, mode, modele, texte, nb_mots, qcm, questions_ouvertes)
+
+
+def statistiques_cache():
+    return _cache.statistiques()
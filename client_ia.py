@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+
+# openai (et httpx, pydantic…) n'est importé qu'à la création du premier
+# client : l'application démarre sans l'attendre (voir benchmarks/bench_demarrage.py)
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+# Adresse de l'API compatible OpenAI (un serveur local pour les tests)
+URL_API = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Délais (secondes) : établissement de la connexion, puis attente de chaque
+# morceau de la réponse (un modèle qui se tait plus longtemps est jugé trop lent)
+DELAI_CONNEXION = 5.0
+DELAI_LECTURE = 30.0
+
+# Connexions gardées ouvertes entre deux générations, et pendant combien de temps
+CONNEXIONS_MAX = 20
+CONNEXIONS_GARDEES = 10
+DUREE_GARDE = 120.0
+
+# Nouvelles tentatives sur 429 et erreurs 5xx : attente aléatoire entre 0 et
+# DELAI_BASE * 2^n, plafonnée à DELAI_MAX (ou l'en-tête Retry-After s'il est plus long)
+TENTATIVES = 3
+DELAI_BASE = 0.5
+DELAI_MAX = 8.0
+
+
+class ErreurGeneration(Exception):
+    """Échec d'un appel au modèle, après les éventuelles nouvelles tentatives."""
+
+
+class GenerationLente(ErreurGeneration):
+    """Le modèle n'a pas répondu dans les délais."""
+
+
+class GenerationLimitee(ErreurGeneration):
+    """Le fournisseur refuse les requêtes (429, limite de débit atteinte)."""
+
+
+class GenerationEchouee(ErreurGeneration):
+    """Toute autre erreur : réseau, clé invalide, erreur du serveur."""
+
+
+class GenerationTronquee(GenerationEchouee):
+    """Réponse coupée par la limite de jetons (max_tokens) : incomplète."""
+
+
+def _est_delai_depasse(erreur):
+    # Une coupure en cours de réponse remonte l'exception du client HTTP
+    # (ReadTimeout…) sans passer par les exceptions d'openai
+    from openai import APITimeoutError
+
+    return isinstance(erreur, APITimeoutError) or any(
+        "Timeout" in classe.__name__ for classe in type(erreur).__mro__
+    )
+
+
+def _est_temporaire(erreur):
+    """Vrai si une nouvelle tentative a des chances d'aboutir (429, 5xx, réseau)."""
+    from openai import APIConnectionError, APIStatusError, RateLimitError
+
+    if isinstance(erreur, RateLimitError):
+        return True
+    if isinstance(erreur, APIStatusError):
+        return erreur.status_code >= 500
+    return isinstance(erreur, APIConnectionError) and not _est_delai_depasse(erreur)
+
+
+def _traduire(erreur):
+    """Convertit une exception du client en ErreurGeneration typée."""
+    from openai import RateLimitError
+
+    if isinstance(erreur, ErreurGeneration):
+        return erreur
+    if _est_delai_depasse(erreur):
+        return GenerationLente(f"Le modèle ne répond pas assez vite : {erreur}")
+    if isinstance(erreur, RateLimitError):
+        return GenerationLimitee(f"Limite de débit atteinte : {erreur}")
+    return GenerationEchouee(f"Échec de l'appel au modèle : {erreur}")
+
+
+def _attente_demandee(erreur):
+    """Délai indiqué par l'en-tête Retry-After d'une réponse 429, ou None."""
+    reponse = getattr(erreur, "response", None)
+    if reponse is None:
+        return None
+    try:
+        return float(reponse.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _couper(reponse):
+    """Coupe la connexion d'une réponse en streaming (depuis n'importe quel thread)."""
+    flux_reseau = reponse.http_response.extensions.get("network_stream")
+    prise = flux_reseau.get_extra_info("socket") if flux_reseau is not None else None
+    if prise is None:
+        return
+    try:
+        # shutdown réveille le thread bloqué en lecture, ce que close ne fait pas
+        prise.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class Annulation(threading.Event):
+    """Signal d'annulation d'une requête, levé depuis un autre thread.
+
+    set() coupe aussi la connexion de la réponse en cours : la lecture
+    bloquée dans ClientIA.flux s'arrête aussitôt, sans attendre le morceau
+    suivant ni le délai de lecture, et le fournisseur abandonne la requête.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._verrou = threading.Lock()
+        self._reponse = None
+
+    def suivre(self, reponse):
+        """Associe la réponse en cours de lecture (coupée tout de suite si l'annulation a eu lieu)."""
+        with self._verrou:
+            self._reponse = reponse
+        if self.is_set():
+            _couper(reponse)
+
+    def set(self):
+        super().set()
+        with self._verrou:
+            reponse, self._reponse = self._reponse, None
+        if reponse is not None:
+            _couper(reponse)
+
+
+def _lire_evenements(reponse):
+    """Renvoie les morceaux de texte d'une réponse en streaming (Server-Sent Events).
+
+    La réponse est lue jusqu'au bout, au-delà de « [DONE] » : une réponse
+    abandonnée avant sa fin ferme la connexion au lieu de la rendre au pool.
+
+    Raises:
+        GenerationTronquee: à la fin d'une réponse coupée par max_tokens
+    """
+    termine = False
+    tronquee = False
+    for ligne in reponse.iter_lines():
+        if termine or not ligne.startswith("data:"):
+            continue
+        donnees = ligne[5:].strip()
+        if donnees == "[DONE]":
+            termine = True
+            continue
+        evenement = json.loads(donnees)
+        if "error" in evenement:
+            raise GenerationEchouee(f"Erreur du modèle : {evenement['error']}")
+        for choix in evenement.get("choices") or ():
+            morceau = (choix.get("delta") or {}).get("content")
+            if morceau:
+                yield morceau
+            if choix.get("finish_reason") == "length":
+                METRIQUES.incrementer("client_ia.tronquees")
+                tronquee = True
+        # Comptes du fournisseur, dans le dernier événement (si l'API les donne)
+        usage = evenement.get("usage")
+        if usage:
+            METRIQUES.observer("client_ia.jetons_prompt", usage.get("prompt_tokens", 0))
+            METRIQUES.observer("client_ia.jetons_reponse", usage.get("completion_tokens", 0))
+    if tronquee:
+        raise GenerationTronquee("Réponse coupée par la limite de jetons")
+
+
+class ClientIA:
+    """Client d'une API compatible OpenAI, partagé par toutes les sessions.
+
+    Un seul client HTTP (et donc un seul pool de connexions) sert tout le
+    processus : les connexions restent ouvertes entre deux générations, sans
+    nouvelle poignée de main TLS. Les nouvelles tentatives sont faites ici
+    (celles du SDK sont désactivées) et seulement avant le premier morceau
+    reçu : un texte déjà affiché n'est jamais recommencé.
+    """
+
+    def __init__(self, api_key, base_url=URL_API, delai_connexion=DELAI_CONNEXION,
+                 delai_lecture=DELAI_LECTURE, tentatives=TENTATIVES, delai_base=DELAI_BASE):
+        from openai import DEFAULT_CONNECTION_LIMITS, DefaultHttpxClient, OpenAI, Timeout
+
+        self.tentatives = tentatives
+        self.delai_base = delai_base
+        limites = type(DEFAULT_CONNECTION_LIMITS)(
+            max_connections=CONNEXIONS_MAX,
+            max_keepalive_connections=CONNEXIONS_GARDEES,
+            keepalive_expiry=DUREE_GARDE,
+        )
+        delais = Timeout(delai_lecture, connect=delai_connexion)
+        self._client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=delais,
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=limites, timeout=delais),
+        )
+
+    def _attendre(self, tentative, erreur):
+        attente = random.uniform(0, min(DELAI_MAX, self.delai_base * 2 ** tentative))
+        demandee = _attente_demandee(erreur)
+        if demandee is not None:
+            attente = max(attente, min(demandee, DELAI_MAX))
+        logger.info("Appel au modèle refusé (%s), nouvelle tentative dans %.2f s", erreur, attente)
+        METRIQUES.incrementer("client_ia.nouvelle_tentative")
+        time.sleep(attente)
+
+    def flux(self, modele, messages, annulation=None, **options):
+        """Envoie une requête en streaming ; renvoie les morceaux de texte reçus.
+
+        Une Annulation levée depuis un autre thread coupe la réponse en cours :
+        le flux s'arrête alors sans erreur.
+
+        Raises:
+            GenerationLente, GenerationLimitee, GenerationEchouee
+        """
+        for tentative in range(self.tentatives):
+            if annulation is not None and annulation.is_set():
+                return
+            recu = False
+            try:
+                with self._client.chat.completions.with_streaming_response.create(
+                    model=modele, messages=messages, stream=True, **options
+                ) as reponse:
+                    if annulation is not None:
+                        annulation.suivre(reponse)
+                    for morceau in _lire_evenements(reponse):
+                        recu = True
+                        yield morceau
+                return
+            except Exception as e:
+                if annulation is not None and annulation.is_set():
+                    # Connexion coupée par l'annulation : rien à signaler
+                    return
+                if recu or not _est_temporaire(e) or tentative == self.tentatives - 1:
+                    erreur = _traduire(e)
+                    METRIQUES.incrementer(f"client_ia.{type(erreur).__name__}")
+                    raise erreur from e
+                self._attendre(tentative, e)
+
+    def fermer(self):
+        self._client.close()
+
+
+_clients = {}
+_verrou = threading.Lock()
+
+
+def client_ia(api_key, base_url=URL_API):
+    """Renvoie le client partagé du processus pour cette clé et cette adresse."""
+    cle = (api_key, base_url)
+    client = _clients.get(cle)
+    if client is None:
+        with _verrou:
+            client = _clients.get(cle)
+            if client is None:
+                client = _clients[cle] = ClientIA(api_key, base_url)
+    return client
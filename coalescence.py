@@ -0,0 +1,98 @@
+import logging
+import threading
+
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+
+class Vol:
+    """Un appel en cours, partagé par toutes les demandes identiques.
+
+    Le producteur publie les morceaux au fur et à mesure puis le résultat
+    final ; chaque abonné relit les morceaux depuis le début, à son rythme.
+    """
+
+    def __init__(self, cle):
+        self.cle = cle
+        self.abonnes = 1
+        self.resultat = None
+        self._morceaux = []
+        self._termine = False
+        self._condition = threading.Condition()
+
+    def publier(self, morceau):
+        with self._condition:
+            self._morceaux.append(morceau)
+            self._condition.notify_all()
+
+    def terminer(self, resultat):
+        with self._condition:
+            self.resultat = resultat
+            self._termine = True
+            self._condition.notify_all()
+
+    def suivre(self):
+        """Renvoie tous les morceaux publiés, en attendant les suivants jusqu'à la fin."""
+        position = 0
+        while True:
+            with self._condition:
+                while position == len(self._morceaux) and not self._termine:
+                    self._condition.wait()
+                nouveaux = self._morceaux[position:]
+                termine = self._termine
+            position += len(nouveaux)
+            yield from nouveaux
+            if termine and position == len(self._morceaux):
+                return
+
+
+class Coalesceur:
+    """Regroupe les appels identiques lancés en même temps (« singleflight »).
+
+    Le premier appel d'une clé démarre le travail dans un thread qui
+    n'appartient à aucune session : une session qui s'arrête en cours de
+    route n'interrompt pas les autres. Les appels identiques suivants
+    s'abonnent au même Vol tant qu'il n'est pas terminé.
+    """
+
+    def __init__(self, nom):
+        self.nom = nom
+        self._vols = {}
+        self._verrou = threading.Lock()
+
+    def rejoindre(self, cle, travail):
+        """Renvoie le Vol en cours pour cette clé, en le lançant au besoin.
+
+        travail(vol) publie les morceaux et doit toujours finir par
+        vol.terminer(resultat).
+        """
+        with self._verrou:
+            vol = self._vols.get(cle)
+            if vol is not None:
+                vol.abonnes += 1
+                METRIQUES.incrementer(f"{self.nom}.coalescees")
+                return vol
+            vol = self._vols[cle] = Vol(cle)
+            METRIQUES.jauge(f"{self.nom}.en_cours", len(self._vols))
+
+        threading.Thread(target=self._executer, args=(vol, travail), name=f"{self.nom}-vol", daemon=True).start()
+        return vol
+
+    def _executer(self, vol, travail):
+        try:
+            travail(vol)
+        except Exception as e:
+            logger.exception("Échec d'un appel partagé (%s)", self.nom)
+            vol.terminer(e)
+        finally:
+            with self._verrou:
+                del self._vols[vol.cle]
+                METRIQUES.jauge(f"{self.nom}.en_cours", len(self._vols))
+            if vol.abonnes > 1:
+                logger.info("Un seul appel pour %d demandes identiques (%s)", vol.abonnes, self.nom)
+
+    def abonnes(self):
+        """Nombre de demandes en attente de chaque appel en cours, par clé."""
+        with self._verrou:
+            return {cle: vol.abonnes for cle, vol in self._vols.items()}
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from base_donnees import connexion_lecture, ouvrir_connexion
+from cache import CacheLRU
+
+# Nombre de niveaux et de textes gardés en mémoire, partagés par toutes les sessions
+TAILLE_CACHE_CONTENU = 512
+
+
+@dataclass(frozen=True)
+class TexteResume:
+    """Entrée de la liste des textes d'un niveau (sans le corps du texte)."""
+    id: int
+    titre: str
+    theme: str
+    difficulte: str
+    image_path: str
+
+
+@dataclass(frozen=True)
+class Qcm:
+    """Question à choix multiple, telle que stockée dans la table qcm."""
+    id: int
+    question: str
+    option_a: str
+    option_b: str
+    option_c: str
+    reponse_correcte: str
+    ordre_difficulte: int
+
+    @property
+    def options(self):
+        return [self.option_a, self.option_b, self.option_c]
+
+
+@dataclass(frozen=True)
+class QuestionOuverte:
+    """Question ouverte avec sa proposition de réponse."""
+    id: int
+    question: str
+    proposition_reponse: str
+    ordre_difficulte: int
+
+
+@dataclass(frozen=True)
+class TexteComplet:
+    """Un texte avec toutes ses questions, prêt à afficher."""
+    id: int
+    titre: str
+    texte: str
+    nb_mots: int
+    theme: str
+    difficulte: str
+    image_path: str
+    qcm: tuple
+    questions_ouvertes: tuple
+
+
+class _SuiviVersion:
+    """Détecte les modifications du contenu de lecture.db.
+
+    PRAGMA data_version (sur une connexion dédiée) change dès qu'une autre
+    connexion, de ce processus ou d'un autre, valide une transaction : c'est un
+    test quasi gratuit. Seulement dans ce cas, on relit le compteur
+    meta.version_contenu, que des triggers n'incrémentent que sur les tables
+    de contenu ; l'enregistrement d'un résultat n'invalide donc pas le cache.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._data_version = None
+        self._version = None
+
+    def version(self):
+        with self._verrou:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = ouvrir_connexion()
+                self._pid = os.getpid()
+                self._data_version = None
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                try:
+                    ligne = self._conn.execute(
+                        "SELECT valeur FROM meta WHERE cle = 'version_contenu'"
+                    ).fetchone()
+                except sqlite3.OperationalError:
+                    ligne = None
+                # Sans compteur (ancienne base), toute écriture invalide le cache
+                self._version = ligne[0] if ligne else ("data_version", data_version)
+            return self._version
+
+
+_suivi_version = _SuiviVersion()
+_cache = CacheLRU(TAILLE_CACHE_CONTENU)
+_version_cache = None
+
+
+def _depuis_cache(cle, charger):
+    """Renvoie la valeur en cache pour cle, ou la charge et la mémorise.
+
+    Le cache est vidé dès que la version du contenu change, si bien qu'un
+    contenu mis à jour apparaît sans redémarrer le serveur.
+    """
+    global _version_cache
+    version = _suivi_version.version()
+    if version != _version_cache:
+        _cache.vider()
+        _version_cache = version
+
+    cle = (version, *cle)
+    valeur = _cache.get(cle)
+    if valeur is None:
+        valeur = charger()
+        _cache.set(cle, valeur)
+    return valeur
+
+
+def vider_cache():
+    """Vide le cache de contenu (après une modification hors de lecture.db)."""
+    _cache.vider()
+
+
+def _lister_textes_base(niveau):
+    with connexion_lecture() as conn:
+        lignes = conn.execute("""
+            SELECT id, titre, theme, difficulte, image_path
+            FROM textes
+            WHERE niveau = ?
+            ORDER BY difficulte
+        """, (niveau,)).fetchall()
+    return tuple(TexteResume(*ligne) for ligne in lignes)
+
+
+def lister_textes(niveau):
+    """Liste les textes d'un niveau, sans charger leur contenu.
+
+    Returns:
+        Un tuple de TexteResume trié par difficulté
+    """
+    return _depuis_cache(("niveau", niveau), lambda: _lister_textes_base(niveau))
+
+
+# Le texte, ses QCM et ses questions ouvertes en un seul aller-retour :
+# les questions sont agrégées en tableaux JSON par des sous-requêtes triées.
+_REQUETE_TEXTE_COMPLET = """
+    SELECT t.id, t.titre, t.texte, t.nb_mots, t.theme, t.difficulte, t.image_path,
+        (SELECT json_group_array(json_array(
+                    q.id, q.question, q.option_a, q.option_b, q.option_c,
+                    q.reponse_correcte, q.ordre_difficulte))
+         FROM (SELECT * FROM qcm
+               WHERE texte_id = t.id
+               ORDER BY ordre_difficulte, id) AS q),
+        (SELECT json_group_array(json_array(
+                    o.id, o.question, o.proposition_reponse, o.ordre_difficulte))
+         FROM (SELECT * FROM questions_ouvertes
+               WHERE texte_id = t.id
+               ORDER BY ordre_difficulte, id) AS o)
+    FROM textes t
+    WHERE t.id = ?
+"""
+
+
+def _charger_texte_base(texte_id):
+    with connexion_lecture() as conn:
+        ligne = conn.execute(_REQUETE_TEXTE_COMPLET, (texte_id,)).fetchone()
+    if ligne is None:
+        return None
+
+    *champs, qcm_json, questions_json = ligne
+    return TexteComplet(
+        *champs,
+        qcm=tuple(Qcm(*q) for q in json.loads(qcm_json)),
+        questions_ouvertes=tuple(QuestionOuverte(*q) for q in json.loads(questions_json))
+    )
+
+
+def charger_texte(texte_id):
+    """Charge un texte avec ses QCM et questions ouvertes en une seule requête.
+
+    Returns:
+        Un TexteComplet, ou None si le texte n'existe pas
+    """
+    return _depuis_cache(("texte", texte_id), lambda: _charger_texte_base(texte_id))
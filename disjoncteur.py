@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+FERME = "fermé"
+OUVERT = "ouvert"
+SEMI_OUVERT = "semi-ouvert"
+
+# Échecs consécutifs qui ouvrent le disjoncteur, et durée d'ouverture (secondes)
+ECHECS_CONSECUTIFS = 3
+DUREE_OUVERTURE = 30.0
+
+# Taux d'échec : appels pris en compte, et nombre minimal avant de conclure
+FENETRE = 20
+APPELS_MIN = 10
+
+
+class Disjoncteur:
+    """Coupe les appels vers un service qui échoue à répétition.
+
+    Fermé, tout passe. Il s'ouvre après echecs_consecutifs échecs d'affilée
+    ou, si taux_echec est donné, quand la part d'échecs parmi les fenetre
+    derniers appels atteint ce taux (au moins appels_min appels). Un appel
+    réussi mais plus long que latence_max secondes compte comme un échec.
+    Ouvert, plus rien ne passe pendant duree_ouverture secondes. Il passe
+    ensuite en semi-ouvert et laisse passer un seul appel d'essai (ou une
+    sonde, voir sonder()) : un succès le referme, un échec le rouvre.
+    """
+
+    def __init__(self, nom, echecs_consecutifs=ECHECS_CONSECUTIFS, duree_ouverture=DUREE_OUVERTURE,
+                 taux_echec=None, fenetre=FENETRE, appels_min=APPELS_MIN, latence_max=None):
+        self.nom = nom
+        self.echecs_consecutifs = echecs_consecutifs
+        self.duree_ouverture = duree_ouverture
+        self.taux_echec = taux_echec
+        self.appels_min = appels_min
+        self.latence_max = latence_max
+        self._etat = FERME
+        self._echecs = 0
+        self._derniers = deque(maxlen=fenetre)
+        self._reouverture = 0.0
+        self._essai_en_cours = False
+        self._verrou = threading.Lock()
+
+    @property
+    def etat(self):
+        with self._verrou:
+            if self._etat == OUVERT and time.monotonic() >= self._reouverture:
+                return SEMI_OUVERT
+            return self._etat
+
+    def autorise(self):
+        """Vrai si un appel peut passer (en semi-ouvert, un seul appel d'essai à la fois)."""
+        with self._verrou:
+            if self._etat == FERME:
+                return True
+            if self._etat == OUVERT:
+                if time.monotonic() < self._reouverture:
+                    return False
+                self._etat = SEMI_OUVERT
+            if self._essai_en_cours:
+                return False
+            self._essai_en_cours = True
+            return True
+
+    def succes(self, duree=None):
+        """Appel réussi, en duree secondes (trop lent au-delà de latence_max : compte comme un échec)."""
+        if duree is not None and self.latence_max is not None and duree > self.latence_max:
+            logger.info("Appel lent via %s (%.1f s)", self.nom, duree)
+            self.echec()
+            return
+        with self._verrou:
+            if self._etat != FERME:
+                logger.info("Disjoncteur %s refermé", self.nom)
+                self._derniers.clear()
+            self._etat = FERME
+            self._echecs = 0
+            self._essai_en_cours = False
+            self._derniers.append(True)
+
+    def echec(self):
+        with self._verrou:
+            self._echecs += 1
+            self._essai_en_cours = False
+            self._derniers.append(False)
+            if self._etat == SEMI_OUVERT or self._echecs >= self.echecs_consecutifs or self._taux_atteint():
+                self._ouvrir()
+
+    def _taux_atteint(self):
+        if self.taux_echec is None or len(self._derniers) < self.appels_min:
+            return False
+        return self._derniers.count(False) / len(self._derniers) >= self.taux_echec
+
+    def sonder(self, essai):
+        """En semi-ouvert, lance essai() dans un thread d'arrière-plan.
+
+        Le résultat de essai() (vrai : succès) referme ou rouvre le
+        disjoncteur ; les appels ordinaires restent coupés pendant ce temps.
+        Sans effet si le disjoncteur n'est pas semi-ouvert ou si une sonde est
+        déjà en cours.
+        """
+        if self.etat != SEMI_OUVERT or not self.autorise():
+            return False
+
+        def sonde():
+            try:
+                reussie = essai()
+            except Exception:
+                logger.exception("Échec de la sonde du disjoncteur %s", self.nom)
+                reussie = False
+            if reussie:
+                self.succes()
+            else:
+                self.echec()
+
+        threading.Thread(target=sonde, name=f"sonde-{self.nom}", daemon=True).start()
+        return True
+
+    def abandon(self):
+        """L'appel autorisé n'a pas abouti (annulé) : ni succès ni échec."""
+        with self._verrou:
+            self._essai_en_cours = False
+
+    def _ouvrir(self):
+        if self._etat != OUVERT:
+            logger.warning("Disjoncteur %s ouvert pour %.0f s", self.nom, self.duree_ouverture)
+            METRIQUES.incrementer(f"disjoncteur.{self.nom}.ouvertures")
+        self._etat = OUVERT
+        self._reouverture = time.monotonic() + self.duree_ouverture
@@ -0,0 +1,243 @@
+import json
+import re
+
+from contenu import Qcm, QuestionOuverte
+from moderation import contient_mot_interdit
+
+# Questions demandées pour chaque texte généré
+NB_QCM = 3
+NB_QUESTIONS_OUVERTES = 2
+
+# Consigne de format ajoutée au prompt système : une seule réponse JSON, le
+# texte en premier pour pouvoir l'afficher pendant qu'il s'écrit
+FORMAT_REPONSE = f"""
+Réponds uniquement avec un objet JSON, sans aucun texte autour, exactement dans cet ordre :
+{{
+  "texte": "le texte complet",
+  "qcm": [
+    {{"question": "...", "options": ["...", "...", "..."], "reponse_correcte": "une des trois options", "ordre_difficulte": 1}}
+  ],
+  "questions_ouvertes": [
+    {{"question": "...", "proposition_reponse": "...", "ordre_difficulte": 1}}
+  ]
+}}
+- "qcm" : {NB_QCM} questions de compréhension sur le texte, de la plus simple (ordre_difficulte 1) à la plus réfléchie (3)
+- "questions_ouvertes" : {NB_QUESTIONS_OUVERTES} questions, avec une proposition de réponse courte
+- Les questions utilisent le même vocabulaire simple que le texte
+"""
+
+# Début du champ « texte » de la réponse JSON
+_DEBUT_TEXTE = re.compile(r'"texte"\s*:\s*"')
+
+_HEXA = re.compile(r"[0-9a-fA-F]{4}")
+
+# Au-delà, une réponse qui ne ressemble pas à du JSON est prise comme du texte brut
+_LIMITE_RECHERCHE = 200
+
+
+class ExtracteurTexte:
+    """Extrait, au fil du streaming, le champ « texte » d'une réponse JSON.
+
+    filtrer() renvoie le texte décodé (échappements JSON compris) dès qu'il
+    arrive ; le reste de la réponse (les questions) est lu à la fin avec
+    questions(). Un modèle qui ignore la consigne et répond en texte brut
+    est accepté tel quel : ses questions seront redemandées.
+    """
+
+    def __init__(self):
+        self.brut = ""
+        self.texte = ""
+        self.json = True
+        self._etat = "recherche"
+        self._position = 0
+
+    def filtrer(self, flux):
+        for fragment in flux:
+            morceau = self.ajouter(fragment)
+            if morceau:
+                yield morceau
+        morceau = self.terminer()
+        if morceau:
+            yield morceau
+
+    def ajouter(self, fragment):
+        """Ajoute un fragment de la réponse ; renvoie le texte nouvellement décodé."""
+        self.brut += fragment
+        if self._etat == "recherche":
+            debut = _DEBUT_TEXTE.search(self.brut)
+            if debut:
+                self._etat = "texte"
+                self._position = debut.end()
+            elif len(self.brut) > _LIMITE_RECHERCHE and not self.brut.lstrip().startswith(("{", "`")):
+                self._etat = "brut"
+                self.json = False
+            else:
+                return ""
+        if self._etat == "brut":
+            morceau, self._position = self.brut[self._position:], len(self.brut)
+            self.texte += morceau
+            return morceau
+        if self._etat == "texte":
+            return self._decoder()
+        return ""
+
+    def terminer(self):
+        """Fin de la réponse : sans champ « texte », elle est prise comme du texte brut."""
+        if self._etat == "recherche" and not self.brut.lstrip().startswith(("{", "`")):
+            self._etat = "brut"
+            self.json = False
+            return self.ajouter("")
+        return ""
+
+    def _decoder(self):
+        """Décode la chaîne JSON du champ texte jusqu'où les données reçues le permettent."""
+        parties = []
+        i, n = self._position, len(self.brut)
+        while i < n:
+            fin = min((j for j in (self.brut.find('"', i), self.brut.find("\\", i)) if j != -1), default=n)
+            parties.append(self.brut[i:fin])
+            i = fin
+            if i == n:
+                break
+            if self.brut[i] == '"':
+                self._etat = "fin"
+                i += 1
+                break
+            # Séquence d'échappement : attendre qu'elle soit complète
+            longueur = 6 if self.brut[i + 1:i + 2] == "u" else 2
+            if i + longueur > n:
+                break
+            sequence = self.brut[i:i + longueur]
+            if longueur == 6 and _HEXA.fullmatch(sequence[2:]) and 0xD800 <= int(sequence[2:], 16) <= 0xDBFF:
+                # Paire de substitution (émoji) : deux séquences \uXXXX
+                if i + 12 > n:
+                    break
+                sequence = self.brut[i:i + 12]
+            try:
+                parties.append(json.loads(f'"{sequence}"'))
+            except ValueError:
+                parties.append(sequence)
+            i += len(sequence)
+        self._position = i
+        morceau = "".join(parties)
+        self.texte += morceau
+        return morceau
+
+    @property
+    def tronque(self):
+        """Vrai si la réponse s'arrête avant la fin de la chaîne du champ « texte »."""
+        return self._etat == "texte"
+
+    def questions(self):
+        """Le reste de la réponse JSON (dict), ou {} si elle est absente ou invalide."""
+        if not self.json:
+            return {}
+        return lire_json(self.brut)
+
+
+def lire_json(brut):
+    """Lit un objet JSON dans la réponse d'un modèle (entouré ou non de ```json)."""
+    debut, fin = brut.find("{"), brut.rfind("}")
+    if debut == -1 or fin < debut:
+        return {}
+    try:
+        donnees = json.loads(brut[debut:fin + 1])
+    except ValueError:
+        return {}
+    return donnees if isinstance(donnees, dict) else {}
+
+
+def _chaine(valeur):
+    if not isinstance(valeur, str) or not valeur.strip() or contient_mot_interdit(valeur):
+        return None
+    return valeur.strip()
+
+
+def _ordre(valeur, defaut):
+    try:
+        ordre = int(valeur)
+    except (TypeError, ValueError):
+        return defaut
+    return min(3, max(1, ordre))
+
+
+def valider_qcm(lignes):
+    """Garde les QCM bien formés (3 options, réponse parmi les options, rien d'interdit)."""
+    qcm = []
+    for ligne in lignes if isinstance(lignes, list) else ():
+        if not isinstance(ligne, dict) or not isinstance(ligne.get("options"), list):
+            continue
+        question = _chaine(ligne.get("question"))
+        options = [_chaine(option) for option in ligne["options"]]
+        reponse = _chaine(ligne.get("reponse_correcte"))
+        if question is None or len(options) != 3 or None in options or reponse not in options:
+            continue
+        qcm.append(Qcm(None, question, *options, reponse, _ordre(ligne.get("ordre_difficulte"), len(qcm) + 1)))
+    return tuple(sorted(qcm, key=lambda q: q.ordre_difficulte)[:NB_QCM])
+
+
+def valider_questions_ouvertes(lignes):
+    """Garde les questions ouvertes bien formées (question et proposition, rien d'interdit)."""
+    questions = []
+    for ligne in lignes if isinstance(lignes, list) else ():
+        if not isinstance(ligne, dict):
+            continue
+        question = _chaine(ligne.get("question"))
+        proposition = _chaine(ligne.get("proposition_reponse"))
+        if question is None or proposition is None:
+            continue
+        questions.append(QuestionOuverte(
+            None, question, proposition, _ordre(ligne.get("ordre_difficulte"), len(questions) + 1)
+        ))
+    return tuple(sorted(questions, key=lambda q: q.ordre_difficulte)[:NB_QUESTIONS_OUVERTES])
+
+
+def parties_manquantes(qcm, questions_ouvertes):
+    """Parties à redemander au modèle : celles qui n'ont pas assez de questions valides."""
+    manquantes = []
+    if len(qcm) < NB_QCM:
+        manquantes.append("qcm")
+    if len(questions_ouvertes) < NB_QUESTIONS_OUVERTES:
+        manquantes.append("questions_ouvertes")
+    return manquantes
+
+
+def messages_questions(age_range, texte, parties):
+    """Messages d'une requête qui ne redemande que les questions manquantes d'un texte."""
+    exemples = {
+        "qcm": f'"qcm": [{NB_QCM} objets {{"question", "options" (3 choix), "reponse_correcte", "ordre_difficulte"}}]',
+        "questions_ouvertes": (
+            f'"questions_ouvertes": [{NB_QUESTIONS_OUVERTES} objets '
+            '{"question", "proposition_reponse", "ordre_difficulte"}]'
+        ),
+    }
+    consigne = ", ".join(exemples[partie] for partie in parties)
+    return [
+        {"role": "system", "content": (
+            f"Tu prépares des questions de compréhension en français pour des enfants de {age_range}. "
+            "Réponds uniquement avec un objet JSON, sans aucun texte autour."
+        )},
+        {"role": "user", "content": f"Voici le texte :\n\n{texte}\n\nDonne un objet JSON avec {consigne}."},
+    ]
+
+
+def questions_vers_json(qcm, questions_ouvertes):
+    """Sérialise les questions d'un texte généré (colonne generations.questions)."""
+    return json.dumps({
+        "qcm": [
+            {"question": q.question, "options": q.options, "reponse_correcte": q.reponse_correcte,
+             "ordre_difficulte": q.ordre_difficulte}
+            for q in qcm
+        ],
+        "questions_ouvertes": [
+            {"question": q.question, "proposition_reponse": q.proposition_reponse,
+             "ordre_difficulte": q.ordre_difficulte}
+            for q in questions_ouvertes
+        ],
+    }, ensure_ascii=False)
+
+
+def questions_depuis_json(contenu):
+    """Inverse de questions_vers_json ; renvoie (qcm, questions_ouvertes)."""
+    donnees = lire_json(contenu or "")
+    return valider_qcm(donnees.get("qcm")), valider_questions_ouvertes(donnees.get("questions_ouvertes"))
@@ -0,0 +1,463 @@
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from cache_generations import cle_generation, enregistrer_generation, generation_au_hasard, lire_generation
+from client_ia import GenerationEchouee, GenerationLente, GenerationLimitee, GenerationTronquee, client_ia
+from coalescence import Coalesceur
+from contenu import charger_texte, lister_textes
+from disjoncteur import FERME, Disjoncteur
+from exercices import (
+    FORMAT_REPONSE,
+    ExtracteurTexte,
+    lire_json,
+    messages_questions,
+    parties_manquantes,
+    valider_qcm,
+    valider_questions_ouvertes,
+)
+from jetons import JETONS_QUESTIONS, budget_modification, budget_reponse, compacter, estimer_jetons, noter_requete
+from metriques import METRIQUES
+from moderation import AnalyseFlux, lexique_courant, texte_repli, texte_secours
+from reserve import ReserveTextes
+from routeur import MODELES, ROUTEUR
+from tokenisation import CompteurMots
+
+logger = logging.getLogger(__name__)
+
+# Modèles du routeur (voir routeur.py), part de la clé du cache : un texte
+# peut venir de l'un ou de l'autre, celui qui a répondu est noté à côté
+MODELES_CLE = ",".join(MODELES)
+
+# Longueur cible du texte selon l'âge
+LONGUEUR_PAR_AGE = {
+    "6–7 ans": "100 à 150 mots",
+    "7–8 ans": "150 à 200 mots",
+    "8–9 ans": "200 à 250 mots"
+}
+
+# Longueur des tranches d'âge inconnues
+LONGUEUR_DEFAUT = "150 mots"
+
+# Jetons de réponse autorisés (max_tokens) : le texte à sa longueur cible,
+# avec une marge, et ses questions
+MAX_JETONS_PAR_AGE = {age: budget_reponse(longueur) for age, longueur in LONGUEUR_PAR_AGE.items()}
+
+# Taille maximale d'un texte à modifier (jetons) : au-delà, la modification
+# est refusée plutôt que de couper l'histoire (les textes générés en font 600 au plus)
+JETONS_MODIFICATION_MAX = 2000
+
+# Niveau scolaire correspondant à chaque tranche d'âge
+AGES_VERS_NIVEAUX = {
+    "6–7 ans": "CP",
+    "7–8 ans": "CE1",
+    "8–9 ans": "CE2"
+}
+
+# Délai maximal avant le premier morceau (secondes) : au-delà, la génération
+# compte comme un échec pour le disjoncteur
+LATENCE_MAX = 10.0
+
+# Appels au modèle en cours, partagés entre les sessions
+_generations = Coalesceur("generation")
+
+# Disjoncteur de toute la génération : ouvert après 5 échecs d'affilée ou la
+# moitié d'échecs (ou de réponses trop lentes) sur les 20 derniers appels
+_disjoncteur = Disjoncteur(
+    "generation", echecs_consecutifs=5, taux_echec=0.5, appels_min=6, latence_max=LATENCE_MAX
+)
+
+# Textes préparés à l'avance ; le remplissage s'efface devant les demandes en
+# cours et s'arrête tant que la génération est coupée
+_reserve = ReserveTextes(occupe=lambda: bool(_generations.abonnes()) or _disjoncteur.etat != FERME)
+
+MESSAGE_ERREUR = "😔 Désolé, je n'arrive pas à générer le texte pour le moment. Réessaie plus tard."
+MESSAGE_LENT = "🐢 L'IA met trop de temps à répondre. Réessaie dans un petit moment."
+MESSAGE_LIMITE = "⏳ Beaucoup de textes sont demandés en ce moment. Réessaie dans une minute."
+MESSAGE_INDISPONIBLE = "🌙 L'IA se repose un petit moment. Réessaie ta modification tout à l'heure !"
+MESSAGE_SECOURS = "🌙 L'IA se repose un petit moment : voici un texte déjà prêt pour toi."
+MESSAGE_TROP_LONG = "📏 Ce texte est trop long pour être modifié. Clique sur « Nouvelle idée » pour en créer un autre !"
+
+
+def message_erreur(erreur):
+    """Message affiché à l'enfant selon le type d'erreur de génération."""
+    if isinstance(erreur, GenerationLente):
+        return MESSAGE_LENT
+    if isinstance(erreur, GenerationLimitee):
+        return MESSAGE_LIMITE
+    return MESSAGE_ERREUR
+
+
+def construire_messages(age_range, mode, user_input, existing_text=None):
+    """Construit les messages (système et utilisateur) envoyés au modèle."""
+    # Longueur cible selon l'âge
+    longueur = LONGUEUR_PAR_AGE.get(age_range, LONGUEUR_DEFAUT)
+
+    # Construire le prompt système
+    system_prompt = f"""Tu es une intelligence artificielle bienveillante qui écrit en français pour des enfants de {age_range}.
+
+Règles à suivre :
+- Écris des phrases courtes et simples
+- Utilise un vocabulaire adapté à l'âge
+- Adopte un ton chaleureux et encourageant
+- Longueur cible : {longueur}
+- INTERDICTIONS ABSOLUES : pas de violence, pas de contenu sexuel, pas de propos effrayants, haineux ou inappropriés pour des enfants
+
+Type de contenu demandé : {mode}
+{FORMAT_REPONSE}"""
+
+    # Si un texte existe déjà, on le modifie selon les instructions
+    if existing_text:
+        # Le texte est renvoyé en entier : la réponse a la place de le réécrire
+        # (voir max_jetons), rien n'est coupé
+        existing_text = compacter(existing_text)
+        user_prompt = f"""Voici un texte existant :
+
+{existing_text}
+
+Modifie ce texte selon cette instruction : {user_input}
+
+Réécris le texte complet en appliquant la modification demandée, en gardant le même style et une longueur de {longueur}."""
+    else:
+        # Adapter le prompt utilisateur selon le mode
+        if mode == "Histoire":
+            user_prompt = f"Écris une histoire douce et imaginative à partir de cette idée : {user_input}"
+        elif mode == "Méditation pour dormir":
+            user_prompt = f"Écris une méditation calme et apaisante pour aider un enfant à s'endormir, inspirée par : {user_input}. Le texte sera lu par un parent à voix douce."
+        else:  # Vulgarisation scientifique
+            user_prompt = f"Explique de façon simple et concrète, avec des exemples du quotidien : {user_input}"
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def max_jetons(age_range, existing_text=None):
+    """max_tokens d'une génération pour cette tranche d'âge (ou de la modification de existing_text)."""
+    if existing_text:
+        return budget_modification(compacter(existing_text), LONGUEUR_PAR_AGE.get(age_range, LONGUEUR_DEFAUT))
+    return MAX_JETONS_PAR_AGE.get(age_range) or budget_reponse(LONGUEUR_DEFAUT)
+
+
+def trop_long(existing_text):
+    """Vrai si le texte est trop long pour être renvoyé au modèle et modifié."""
+    return estimer_jetons(compacter(existing_text)) > JETONS_MODIFICATION_MAX
+
+
+@dataclass(frozen=True)
+class ResultatGeneration:
+    """Issue d'un appel au modèle, partagée par toutes les demandes identiques."""
+    texte: str
+    nb_mots: int
+    moderee: bool
+    erreur: Exception
+    premier_morceau: float = None
+    qcm: tuple = ()
+    questions_ouvertes: tuple = ()
+    jetons: int = 0
+    modele: str = None
+
+
+def executer_generation(flux, mode, publier=None, completer=None):
+    """Consomme la réponse du modèle en la vérifiant morceau par morceau.
+
+    La réponse est un objet JSON (texte, QCM, questions ouvertes) : le texte
+    est extrait et vérifié au fil de l'eau, publier(segment) recevant chaque
+    partie validée par la modération. Au premier mot interdit, la requête est
+    interrompue et le texte de repli du mode est renvoyé à la place. Les
+    questions sont validées une à une à la fin ; s'il en manque,
+    completer(texte, parties) redemande seulement les parties manquantes.
+    Une réponse sans texte ou coupée par la limite de jetons (max_tokens)
+    est un échec (GenerationEchouee) : elle n'est donc jamais mise en cache.
+    Si flux est un routeur.FluxRoute, le résultat nomme le modèle qui a répondu.
+
+    Returns:
+        Un ResultatGeneration
+    """
+    debut = time.perf_counter()
+    premier_morceau = None
+    analyse = AnalyseFlux()
+    compteur = CompteurMots()
+    extracteur = ExtracteurTexte()
+    texte_flux = extracteur.filtrer(flux)
+    erreur = None
+
+    def valider(segment):
+        nonlocal premier_morceau
+        if premier_morceau is None:
+            premier_morceau = time.perf_counter() - debut
+        compteur.ajouter(segment)
+        if publier is not None:
+            publier(segment)
+
+    try:
+        for fragment in texte_flux:
+            segment = analyse.ajouter(fragment)
+            if analyse.mot_trouve:
+                break
+            if segment:
+                valider(segment)
+        segment = analyse.terminer()
+        if segment:
+            valider(segment)
+        if not analyse.mot_trouve and extracteur.tronque:
+            # Chaîne « texte » jamais fermée : la fin de l'histoire manque
+            raise GenerationTronquee("Réponse du modèle coupée au milieu du texte")
+        if not analyse.mot_trouve and not analyse.texte_valide.strip():
+            # Réponse JSON sans champ « texte » (ou texte vide) : rien à lire
+            raise GenerationEchouee("Réponse du modèle sans texte")
+    except Exception as e:
+        logger.warning("Échec de la génération (%s) : %s", type(e).__name__, e)
+        erreur = e
+    finally:
+        texte_flux.close()
+        flux.close()
+
+    if analyse.mot_trouve:
+        logger.warning("Génération interrompue par la modération (%s)",
+                       lexique_courant().categorie(analyse.mot_trouve))
+        METRIQUES.incrementer("generation.moderee")
+        texte = texte_repli(mode)
+        return ResultatGeneration(texte, CompteurMots().ajouter(texte), True, None, premier_morceau,
+                                  jetons=estimer_jetons(extracteur.brut))
+    if erreur is not None:
+        METRIQUES.incrementer("generation.erreur")
+        return ResultatGeneration(message_erreur(erreur), 0, False, erreur, premier_morceau,
+                                  jetons=estimer_jetons(extracteur.brut))
+    METRIQUES.incrementer("generation.succes")
+    qcm, questions_ouvertes = _questions(extracteur.questions(), analyse.texte_valide, completer)
+    return ResultatGeneration(
+        analyse.texte_valide, compteur.total, False, None, premier_morceau, qcm, questions_ouvertes,
+        estimer_jetons(extracteur.brut), getattr(flux, "modele", None)
+    )
+
+
+def _questions(donnees, texte, completer):
+    """Questions valides de la réponse, complétées au besoin par une seconde requête."""
+    qcm = valider_qcm(donnees.get("qcm"))
+    questions_ouvertes = valider_questions_ouvertes(donnees.get("questions_ouvertes"))
+    manquantes = parties_manquantes(qcm, questions_ouvertes)
+    if not manquantes or completer is None or not texte.strip():
+        return qcm, questions_ouvertes
+
+    METRIQUES.incrementer("exercices.relance")
+    logger.info("Questions incomplètes (%s) : nouvelle demande", ", ".join(manquantes))
+    try:
+        complement = completer(texte, manquantes)
+    except Exception as e:
+        logger.warning("Échec de la demande de questions : %s", e)
+        return qcm, questions_ouvertes
+    if "qcm" in manquantes:
+        qcm = valider_qcm(complement.get("qcm")) or qcm
+    if "questions_ouvertes" in manquantes:
+        questions_ouvertes = valider_questions_ouvertes(complement.get("questions_ouvertes")) or questions_ouvertes
+    return qcm, questions_ouvertes
+
+
+def _completer_questions(api_key, age_range):
+    """Fonction qui redemande au modèle les questions manquantes d'un texte."""
+    def completer(texte, parties):
+        messages = messages_questions(age_range, texte, parties)
+        flux = ROUTEUR.flux(client_ia(api_key), messages, couverture=False, max_tokens=JETONS_QUESTIONS)
+        reponse = "".join(flux)
+        noter_requete("questions", messages, JETONS_QUESTIONS, estimer_jetons(reponse))
+        return lire_json(reponse)
+    return completer
+
+
+class GenerationFlux:
+    """Génération d'un texte, consommée morceau par morceau.
+
+    Itérer sur l'objet renvoie les morceaux de texte au fur et à mesure de leur
+    arrivée, une fois vérifiés par la modération. À la fin de l'itération :
+    - texte contient le texte final (le texte de repli si la modération a
+      interrompu la génération, un message d'excuse en cas d'erreur),
+    - erreur l'exception rencontrée (GenerationLente, GenerationLimitee ou
+      GenerationEchouee du module client_ia), ou None,
+    - nb_mots son nombre de mots, compté au fil de l'eau,
+    - qcm et questions_ouvertes les questions de compréhension du texte
+      (tuples de contenu.Qcm et contenu.QuestionOuverte, éventuellement vides),
+    - premier_morceau et duree les délais (en secondes) avant le premier
+      morceau affiché et jusqu'à la fin.
+
+    Une demande identique déjà servie (même âge, mode, demande normalisée,
+    texte à modifier et liste des modèles) est rendue depuis le cache des générations ;
+    depuis_cache vaut alors True. Des demandes identiques simultanées
+    partagent un même appel au modèle (voir coalescence.py). Une demande sans
+    idée particulière (saisie vide ou texte de secours du mode) est servie
+    depuis la réserve de textes préparés à l'avance ; depuis_reserve vaut
+    alors True. Si la réserve est vide, elle est générée, sans passer par le
+    cache : une surprise n'est jamais la même pendant 7 jours. Quand le disjoncteur de la génération est ouvert, la réponse
+    est immédiate : un texte local pour l'âge et le mode (depuis_secours vaut
+    True), ou MESSAGE_INDISPONIBLE pour une modification. Un texte trop long
+    pour être modifié (JETONS_MODIFICATION_MAX) reçoit MESSAGE_TROP_LONG.
+    """
+
+    def __init__(self, api_key, age_range, mode, user_input, existing_text=None):
+        self.api_key = api_key
+        self.age_range = age_range
+        self.mode = mode
+        self.existing_text = existing_text
+        if not user_input.strip():
+            user_input = texte_secours(mode)
+        self.generique = not existing_text and user_input == texte_secours(mode)
+        self.messages = construire_messages(age_range, mode, user_input, existing_text)
+        self.max_jetons = max_jetons(age_range, existing_text)
+        self.cle = cle_generation(age_range, mode, user_input, existing_text, MODELES_CLE)
+        self.depuis_cache = False
+        self.depuis_reserve = False
+        self.depuis_secours = False
+        self.texte = None
+        self.nb_mots = 0
+        self.qcm = ()
+        self.questions_ouvertes = ()
+        self.moderee = False
+        self.erreur = None
+        self.premier_morceau = None
+        self.duree = None
+
+    def _flux_modele(self):
+        # Client partagé par tout le processus (connexions gardées ouvertes),
+        # requête doublée vers un second modèle si le premier tarde
+        return ROUTEUR.flux(client_ia(self.api_key), self.messages, max_tokens=self.max_jetons)
+
+    def __iter__(self):
+        debut = time.perf_counter()
+
+        if self.existing_text and trop_long(self.existing_text):
+            # Refusé plutôt que coupé : la fin de l'histoire serait perdue
+            METRIQUES.incrementer("generation.trop_long")
+            self.erreur = GenerationEchouee("Texte à modifier trop long")
+            self.texte = MESSAGE_TROP_LONG
+            self.duree = time.perf_counter() - debut
+            return
+
+        # Pas d'idée particulière : un texte préparé à l'avance, s'il en reste
+        pret = _reserve.prendre(self.age_range, self.mode) if self.generique else None
+        if pret is not None:
+            self.depuis_reserve = True
+            METRIQUES.incrementer("generation.reserve")
+        else:
+            # Même demande déjà servie : le texte est rendu d'un coup, sans appel
+            # au modèle (sauf une surprise, qui doit changer à chaque fois)
+            pret = None if self.generique else lire_generation(self.cle)
+            if pret is not None:
+                self.depuis_cache = True
+                METRIQUES.incrementer("generation.cache")
+            elif _disjoncteur.etat != FERME:
+                # Génération coupée : réponse immédiate, sans attendre un échec ;
+                # une sonde d'arrière-plan vérifie si le service est revenu
+                _disjoncteur.sonder(lambda: _sonder(self.api_key, self.age_range, self.mode))
+                METRIQUES.incrementer("generation.coupee")
+                if self.existing_text:
+                    # Une modification ne peut pas être remplacée par un autre texte
+                    self.erreur = GenerationEchouee("Génération coupée par le disjoncteur")
+                    self.texte = MESSAGE_INDISPONIBLE
+                    self.duree = time.perf_counter() - debut
+                    return
+                pret = texte_local(self.age_range, self.mode)
+                self.depuis_secours = True
+        if pret is not None:
+            self.texte = pret.texte
+            self.nb_mots = pret.nb_mots
+            self.qcm = tuple(pret.qcm)
+            self.questions_ouvertes = tuple(pret.questions_ouvertes)
+            self.premier_morceau = self.duree = time.perf_counter() - debut
+            yield self.texte
+            return
+
+        # Demandes identiques simultanées (toute une classe qui tape la même
+        # idée) : un seul appel au modèle, suivi par toutes les sessions
+        vol = _generations.rejoindre(self.cle, self._produire)
+        for segment in vol.suivre():
+            if self.premier_morceau is None:
+                self.premier_morceau = time.perf_counter() - debut
+                METRIQUES.observer("generation.premier_morceau", self.premier_morceau)
+            yield segment
+
+        resultat = vol.resultat
+        if isinstance(resultat, Exception):
+            resultat = ResultatGeneration(message_erreur(resultat), 0, False, resultat)
+        self.texte = resultat.texte
+        self.nb_mots = resultat.nb_mots
+        self.moderee = resultat.moderee
+        self.erreur = resultat.erreur
+        self.qcm = resultat.qcm
+        self.questions_ouvertes = resultat.questions_ouvertes
+
+        self.duree = time.perf_counter() - debut
+        METRIQUES.observer("generation.duree", self.duree)
+        logger.info("Génération terminée en %.2f s (premier morceau : %s)", self.duree,
+                    f"{self.premier_morceau:.2f} s" if self.premier_morceau is not None else "aucun")
+
+    def _produire(self, vol):
+        """Appelle le modèle et publie dans vol les morceaux validés (thread du Vol)."""
+        resultat = executer_generation(
+            self._flux_modele(), self.mode, vol.publier, _completer_questions(self.api_key, self.age_range)
+        )
+        noter_requete("generation", self.messages, self.max_jetons, resultat.jetons)
+        if resultat.erreur is None:
+            _disjoncteur.succes(duree=resultat.premier_morceau)
+        else:
+            _disjoncteur.echec()
+        if resultat.erreur is None and not resultat.moderee and resultat.texte.strip() and not self.generique:
+            # Modèle qui a effectivement répondu (couverture ou repli compris)
+            enregistrer_generation(self.cle, self.age_range, self.mode, resultat.modele or MODELES[0],
+                                   resultat.texte, resultat.nb_mots, resultat.qcm, resultat.questions_ouvertes)
+        vol.terminer(resultat)
+
+
+def texte_local(age_range, mode):
+    """Texte disponible sans appel au modèle, pour cet âge et ce mode.
+
+    Dans l'ordre : la réserve de textes, un texte déjà généré, un texte du
+    corpus du niveau (pour les histoires), et en dernier recours le texte de
+    repli du lexique.
+    """
+    texte = _reserve.prendre(age_range, mode) or generation_au_hasard(age_range, mode)
+    if texte is None and mode == "Histoire":
+        textes = lister_textes(AGES_VERS_NIVEAUX.get(age_range, "CP"))
+        if textes:
+            texte = charger_texte(random.choice(textes).id)
+    if texte is None:
+        contenu = texte_repli(mode)
+        return ResultatGeneration(contenu, CompteurMots().ajouter(contenu), False, None)
+    return texte
+
+
+def _sonder(api_key, age_range, mode):
+    """Essai d'une génération complète : vrai si elle réussit dans les délais."""
+    resultat = produire_texte(api_key, age_range, mode, texte_secours(mode))
+    return resultat.erreur is None and (resultat.premier_morceau or 0) <= LATENCE_MAX
+
+
+def produire_texte(api_key, age_range, mode, user_input):
+    """Génère un texte complet, sans cache ni regroupement (réserve de textes)."""
+    messages = construire_messages(age_range, mode, user_input)
+    flux = ROUTEUR.flux(client_ia(api_key), messages, couverture=False, max_tokens=max_jetons(age_range))
+    resultat = executer_generation(flux, mode, completer=_completer_questions(api_key, age_range))
+    noter_requete("reserve", messages, max_jetons(age_range), resultat.jetons)
+    return resultat
+
+
+def demarrer_reserve(api_key):
+    """Lance le remplissage de la réserve pour chaque âge et chaque mode (une fois par processus)."""
+    seaux = [(age, mode) for age in LONGUEUR_PAR_AGE for mode in lexique_courant().textes_secours]
+    _reserve.demarrer(lambda age, mode: produire_texte(api_key, age, mode, texte_secours(mode)), seaux)
+
+
+def niveaux_reserve():
+    """Nombre de textes prêts dans la réserve, par (âge, mode)."""
+    return _reserve.niveaux()
+
+
+def generations_en_cours():
+    """Nombre de demandes qui attendent chaque génération en cours, par clé."""
+    return _generations.abonnes()
+
+
+def generer_texte(api_key, age_range, mode, user_input, existing_text=None):
+    """Lance la génération d'un texte ; le résultat s'itère morceau par morceau."""
+    return GenerationFlux(api_key, age_range, mode, user_input, existing_text)
@@ -0,0 +1,402 @@
+import logging
+import os
+import re
+import tempfile
+from io import BytesIO
+
+from cache import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+# Taille des illustrations générées (pixels)
+LARGEUR = 400
+HAUTEUR = 300
+
+# Images encodées gardées en mémoire, partagées par toutes les sessions
+TAILLE_CACHE = 128
+
+# Thèmes et leurs configurations visuelles (icônes simples, sans texte)
+THEMES = {
+    # Animaux
+    "chat": {
+        "bg": "#FFF5E6",
+        "shapes": [
+            ("ellipse", "#FFB366", 150, 120, 250, 200),  # Corps
+            ("ellipse", "#FFB366", 170, 80, 230, 130),   # Tête
+            ("ellipse", "#333333", 185, 95, 195, 105),   # Œil
+            ("ellipse", "#333333", 205, 95, 215, 105),   # Œil
+            ("polygon", "#FFB366", [(150, 85), (160, 60), (175, 85)]),  # Oreille
+            ("polygon", "#FFB366", [(225, 85), (240, 60), (250, 85)]),  # Oreille
+        ]
+    },
+    "chien": {
+        "bg": "#F5F0E6",
+        "shapes": [
+            ("ellipse", "#8B4513", 140, 120, 260, 220),  # Corps
+            ("ellipse", "#8B4513", 160, 70, 240, 140),   # Tête
+            ("ellipse", "#333333", 180, 90, 190, 100),   # Œil
+            ("ellipse", "#333333", 210, 90, 220, 100),   # Œil
+            ("ellipse", "#5D3A1A", 190, 105, 210, 120),  # Museau
+        ]
+    },
+    "hamster": {
+        "bg": "#FFF8E1",
+        "shapes": [
+            ("ellipse", "#D4A574", 150, 100, 250, 200),  # Corps rond
+            ("ellipse", "#F5DEB3", 170, 130, 230, 180),  # Ventre
+            ("ellipse", "#333333", 175, 120, 185, 130),  # Œil
+            ("ellipse", "#333333", 215, 120, 225, 130),  # Œil
+        ]
+    },
+    # École
+    "ecole": {
+        "bg": "#E3F2FD",
+        "shapes": [
+            ("rectangle", "#FFC107", 120, 100, 280, 220),  # Bâtiment
+            ("polygon", "#FF5722", [(120, 100), (200, 50), (280, 100)]),  # Toit
+            ("rectangle", "#795548", 180, 160, 220, 220),  # Porte
+            ("rectangle", "#81D4FA", 140, 120, 160, 150),  # Fenêtre
+            ("rectangle", "#81D4FA", 240, 120, 260, 150),  # Fenêtre
+        ]
+    },
+    "recre": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("rectangle", "#8BC34A", 0, 200, 400, 300),   # Sol
+            ("ellipse", "#FF5722", 180, 100, 220, 140),   # Ballon
+            ("ellipse", "#2196F3", 120, 160, 150, 190),   # Bille
+            ("ellipse", "#9C27B0", 250, 150, 280, 180),   # Bille
+        ]
+    },
+    "spectacle": {
+        "bg": "#FCE4EC",
+        "shapes": [
+            ("rectangle", "#9C27B0", 100, 180, 300, 250),  # Scène
+            ("polygon", "#FFEB3B", [(200, 80), (180, 130), (220, 130)]),  # Étoile
+            ("ellipse", "#4CAF50", 160, 120, 190, 180),   # Personnage
+            ("ellipse", "#F44336", 210, 120, 240, 180),   # Personnage
+        ]
+    },
+    # Jeux et activités
+    "ballon": {
+        "bg": "#FFEBEE",
+        "shapes": [
+            ("ellipse", "#F44336", 140, 80, 260, 200),    # Ballon
+            ("ellipse", "#FFCDD2", 160, 100, 200, 140),   # Reflet
+        ]
+    },
+    "velo": {
+        "bg": "#E0F7FA",
+        "shapes": [
+            ("ellipse", "#333333", 100, 150, 160, 210),   # Roue arrière
+            ("ellipse", "#333333", 240, 150, 300, 210),   # Roue avant
+            ("polygon", "#2196F3", [(130, 180), (200, 120), (270, 180), (200, 160)]),  # Cadre
+        ]
+    },
+    "piscine": {
+        "bg": "#E3F2FD",
+        "shapes": [
+            ("rectangle", "#81D4FA", 80, 120, 320, 220),  # Eau
+            ("ellipse", "#BBDEFB", 120, 140, 180, 180),   # Vague
+            ("ellipse", "#BBDEFB", 200, 150, 260, 190),   # Vague
+        ]
+    },
+    "foot": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("rectangle", "#8BC34A", 0, 200, 400, 300),   # Pelouse
+            ("ellipse", "#FFFFFF", 160, 100, 240, 180),   # Ballon
+            ("polygon", "#333333", [(185, 120), (200, 110), (215, 120), (210, 135), (190, 135)]),  # Pentagone
+        ]
+    },
+    # Quotidien
+    "maman": {
+        "bg": "#FCE4EC",
+        "shapes": [
+            ("ellipse", "#F48FB1", 160, 80, 240, 160),    # Tête
+            ("ellipse", "#F48FB1", 140, 150, 260, 250),   # Corps
+            ("ellipse", "#E91E63", 170, 170, 230, 220),   # Cœur/tablier
+        ]
+    },
+    "dejeuner": {
+        "bg": "#FFF8E1",
+        "shapes": [
+            ("rectangle", "#FFCC80", 100, 150, 300, 250), # Table
+            ("ellipse", "#FFFFFF", 150, 110, 220, 160),   # Bol
+            ("rectangle", "#D7CCC8", 240, 120, 270, 170), # Verre
+        ]
+    },
+    "nuit": {
+        "bg": "#303F9F",
+        "shapes": [
+            ("ellipse", "#FFF59D", 260, 60, 320, 120),    # Lune
+            ("ellipse", "#FFFFFF", 120, 80, 130, 90),     # Étoile
+            ("ellipse", "#FFFFFF", 160, 100, 170, 110),   # Étoile
+            ("ellipse", "#FFFFFF", 200, 70, 210, 80),     # Étoile
+        ]
+    },
+    # Nature et météo
+    "parc": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("rectangle", "#8BC34A", 0, 200, 400, 300),   # Herbe
+            ("ellipse", "#4CAF50", 100, 100, 180, 180),   # Arbre
+            ("rectangle", "#795548", 130, 180, 150, 220), # Tronc
+            ("ellipse", "#FFEB3B", 280, 50, 340, 110),    # Soleil
+        ]
+    },
+    "jardin": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("rectangle", "#8D6E63", 80, 180, 320, 260),  # Terre
+            ("ellipse", "#F44336", 120, 130, 160, 170),   # Tomate
+            ("ellipse", "#F44336", 200, 140, 240, 180),   # Tomate
+            ("polygon", "#4CAF50", [(140, 130), (145, 100), (150, 130)]),  # Feuille
+        ]
+    },
+    "pluie": {
+        "bg": "#ECEFF1",
+        "shapes": [
+            ("ellipse", "#78909C", 120, 80, 280, 160),    # Nuage
+            ("ellipse", "#2196F3", 150, 180, 160, 200),   # Goutte
+            ("ellipse", "#2196F3", 200, 190, 210, 210),   # Goutte
+            ("ellipse", "#2196F3", 250, 175, 260, 195),   # Goutte
+        ]
+    },
+    "tempete": {
+        "bg": "#455A64",
+        "shapes": [
+            ("ellipse", "#78909C", 100, 60, 300, 150),    # Nuage
+            ("polygon", "#FFEB3B", [(200, 150), (180, 200), (210, 190), (190, 240)]),  # Éclair
+        ]
+    },
+    "orage": {
+        "bg": "#37474F",
+        "shapes": [
+            ("ellipse", "#607D8B", 100, 60, 300, 140),    # Nuage
+            ("polygon", "#FFEB3B", [(200, 140), (170, 200), (210, 180), (180, 250)]),  # Éclair
+        ]
+    },
+    "camping": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("polygon", "#FF7043", [(200, 100), (120, 220), (280, 220)]),  # Tente
+            ("rectangle", "#795548", 185, 180, 215, 220), # Entrée
+            ("ellipse", "#81D4FA", 80, 180, 160, 230),    # Lac
+        ]
+    },
+    # Cuisine
+    "gateau": {
+        "bg": "#FBE9E7",
+        "shapes": [
+            ("ellipse", "#D7CCC8", 100, 180, 300, 260),   # Assiette
+            ("rectangle", "#8D6E63", 140, 100, 260, 200), # Gâteau
+            ("rectangle", "#FFEB3B", 195, 70, 205, 100),  # Bougie
+            ("ellipse", "#FF5722", 193, 55, 207, 70),     # Flamme
+        ]
+    },
+    # Lecture et découverte
+    "biblio": {
+        "bg": "#F3E5F5",
+        "shapes": [
+            ("rectangle", "#CE93D8", 80, 80, 180, 240),   # Étagère
+            ("rectangle", "#F48FB1", 90, 90, 110, 150),   # Livre
+            ("rectangle", "#90CAF9", 115, 100, 135, 150), # Livre
+            ("rectangle", "#A5D6A7", 140, 85, 160, 150),  # Livre
+            ("rectangle", "#FFCC80", 220, 120, 300, 180), # Livre ouvert
+        ]
+    },
+    "lettre": {
+        "bg": "#E8EAF6",
+        "shapes": [
+            ("rectangle", "#FFFFFF", 120, 100, 280, 200), # Enveloppe
+            ("polygon", "#C5CAE9", [(120, 100), (200, 150), (280, 100)]),  # Rabat
+            ("ellipse", "#F44336", 240, 160, 270, 190),   # Cœur/timbre
+        ]
+    },
+    "musee": {
+        "bg": "#EFEBE9",
+        "shapes": [
+            ("rectangle", "#8D6E63", 100, 120, 300, 240), # Bâtiment
+            ("polygon", "#795548", [(100, 120), (200, 60), (300, 120)]),  # Fronton
+            ("rectangle", "#FFCC80", 140, 160, 170, 240), # Colonne
+            ("rectangle", "#FFCC80", 230, 160, 260, 240), # Colonne
+        ]
+    },
+    "zoo": {
+        "bg": "#FFF3E0",
+        "shapes": [
+            ("ellipse", "#FFB74D", 120, 100, 200, 180),   # Lion
+            ("ellipse", "#FFE0B2", 140, 130, 180, 160),   # Crinière
+            ("ellipse", "#FFCC80", 250, 80, 280, 200),    # Girafe cou
+            ("ellipse", "#FFCC80", 240, 60, 290, 100),    # Girafe tête
+        ]
+    },
+    # Autres
+    "rentree": {
+        "bg": "#E3F2FD",
+        "shapes": [
+            ("rectangle", "#2196F3", 140, 100, 260, 200), # Cartable
+            ("rectangle", "#1976D2", 160, 80, 240, 110),  # Rabat
+            ("ellipse", "#FFC107", 180, 130, 220, 170),   # Boucle
+        ]
+    },
+    "cabane": {
+        "bg": "#E8F5E9",
+        "shapes": [
+            ("rectangle", "#8D6E63", 120, 140, 280, 240), # Cabane
+            ("polygon", "#795548", [(110, 140), (200, 80), (290, 140)]),  # Toit
+            ("rectangle", "#4CAF50", 170, 180, 230, 240), # Entrée
+        ]
+    },
+    "demenagement": {
+        "bg": "#FFF8E1",
+        "shapes": [
+            ("rectangle", "#8D6E63", 100, 140, 300, 240), # Carton
+            ("rectangle", "#A1887F", 100, 140, 300, 160), # Rabat
+            ("ellipse", "#F48FB1", 180, 80, 220, 120),    # Cœur
+        ]
+    },
+    "marche": {
+        "bg": "#FFF3E0",
+        "shapes": [
+            ("rectangle", "#FF8A65", 100, 120, 200, 200), # Étal
+            ("ellipse", "#F44336", 120, 100, 150, 130),   # Pomme
+            ("ellipse", "#4CAF50", 160, 100, 190, 130),   # Pomme
+            ("ellipse", "#FF9800", 250, 140, 280, 200),   # Carotte
+        ]
+    },
+    "default": {
+        "bg": "#F5F5F5",
+        "shapes": [
+            ("ellipse", "#BBDEFB", 120, 100, 200, 180),
+            ("ellipse", "#C8E6C9", 200, 120, 280, 200),
+        ]
+    }
+}
+
+# Mots du titre qui désignent un thème sans contenir son nom
+# (« rentrée » ne contient pas « rentree »)
+ALIAS = {
+    "minou": "chat",
+    "caramel": "chat",
+    "filou": "chien",
+    "école": "ecole",
+    "rentrée": "ecole",
+    "correspondant": "lettre",
+}
+
+
+def _motif(mots):
+    """Expression qui trouve chacun des mots, même imbriqués (« orage » dans « orageux »)."""
+    return re.compile("(?=(" + "|".join(re.escape(mot) for mot in mots) + "))")
+
+
+# Compilés une fois : les thèmes gardent leur ordre de priorité (le premier
+# de la table l'emporte quand plusieurs correspondent)
+_CLES = tuple(cle for cle in THEMES if cle != "default")
+_RANG_CLES = {cle: rang for rang, cle in enumerate(_CLES)}
+_MOTIF_CLES = _motif(_CLES)
+_RANG_ALIAS = {mot: rang for rang, mot in enumerate(ALIAS)}
+_MOTIF_ALIAS = _motif(ALIAS)
+
+_images = CacheLRU(TAILLE_CACHE)
+
+
+def _chercher(texte, motif, rangs):
+    trouves = motif.findall(texte)
+    return min(trouves, key=rangs.__getitem__) if trouves else None
+
+
+def theme_image(image_path, titre):
+    """Thème d'une illustration : d'après le nom du fichier, puis le titre du texte."""
+    nom = os.path.basename(image_path).lower()
+    titre = titre.lower()
+    cle = _chercher(nom, _MOTIF_CLES, _RANG_CLES) or _chercher(titre, _MOTIF_CLES, _RANG_CLES)
+    if cle is None:
+        alias = _chercher(titre, _MOTIF_ALIAS, _RANG_ALIAS)
+        cle = ALIAS[alias] if alias else "default"
+    return cle
+
+
+def dessiner(theme):
+    """Dessine l'illustration d'un thème ; renvoie l'image PNG encodée."""
+    from PIL import Image, ImageDraw
+
+    config = THEMES[theme]
+    img = Image.new('RGB', (LARGEUR, HAUTEUR), color=config["bg"])
+    draw = ImageDraw.Draw(img)
+    for shape in config["shapes"]:
+        if shape[0] == "ellipse":
+            draw.ellipse([shape[2], shape[3], shape[4], shape[5]], fill=shape[1])
+        elif shape[0] == "rectangle":
+            draw.rectangle([shape[2], shape[3], shape[4], shape[5]], fill=shape[1])
+        elif shape[0] == "polygon":
+            draw.polygon(shape[2], fill=shape[1])
+
+    sortie = BytesIO()
+    img.save(sortie, format="PNG")
+    return sortie.getvalue()
+
+
+def ecrire_atomique(chemin, octets):
+    """Écrit un fichier d'un coup : fichier temporaire voisin, puis renommage.
+
+    Deux sessions qui écrivent le même fichier ne produisent jamais un
+    fichier tronqué ; un lecteur voit l'ancien contenu ou le nouveau.
+    """
+    dossier = os.path.dirname(chemin) or "."
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descripteur, "wb") as fichier:
+            fichier.write(octets)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        os.unlink(temporaire)
+        raise
+
+
+def date_modification(chemin):
+    """Date de modification d'un fichier (ns), ou None s'il n'existe pas."""
+    try:
+        return os.stat(chemin).st_mtime_ns
+    except OSError:
+        return None
+
+
+def image_octets(image_path, titre):
+    """Illustration d'un texte (PNG encodé), ou None si elle ne peut être produite.
+
+    L'image est lue une fois puis servie depuis un cache LRU partagé par
+    toutes les sessions, tant que le fichier ne change pas (sa date de
+    modification fait partie de la clé). Si le fichier n'existe pas, une
+    icône est dessinée d'après le thème et écrite sur disque ; une erreur
+    d'écriture n'empêche pas de l'afficher.
+    """
+    theme = theme_image(image_path, titre)
+    cle = (image_path, theme, date_modification(image_path))
+    octets = _images.get(cle)
+    if octets is not None:
+        return octets
+
+    try:
+        with open(image_path, "rb") as fichier:
+            octets = fichier.read()
+    except FileNotFoundError:
+        try:
+            octets = dessiner(theme)
+        except Exception:
+            logger.exception("Illustration %s impossible à dessiner", image_path)
+            return None
+        try:
+            ecrire_atomique(image_path, octets)
+        except OSError:
+            logger.exception("Illustration %s impossible à enregistrer", image_path)
+        cle = (image_path, theme, date_modification(image_path))
+    except OSError:
+        logger.exception("Illustration %s illisible", image_path)
+        return None
+    _images.set(cle, octets)
+    return octets
+
@@ -0,0 +1,374 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from base_donnees import connexion_ecriture, connexion_lecture
+from tokenisation import compter_mots
+
+# Nombre de textes insérés par transaction
+TAILLE_LOT = 1000
+
+# Niveaux acceptés dans la colonne textes.niveau
+NIVEAUX = ("CP", "CE1", "CE2")
+
+# Nombre d'erreurs de validation détaillées dans le rapport
+MAX_ERREURS_AFFICHEES = 10
+
+
+class ErreurCorpus(ValueError):
+    """Enregistrement de corpus invalide."""
+
+    def __init__(self, source, numero, message):
+        super().__init__(f"{source}:{numero} : {message}")
+        self.source = source
+        self.numero = numero
+
+
+@dataclass
+class RapportIngestion:
+    """Bilan d'une ingestion : textes ajoutés, modifiés, supprimés, rejets et débit."""
+    ajoutes: int = 0
+    modifies: int = 0
+    inchanges: int = 0
+    supprimes: int = 0
+    qcm: int = 0
+    questions_ouvertes: int = 0
+    rejets: int = 0
+    erreurs: list = field(default_factory=list)
+    duree: float = 0.0
+
+    @property
+    def textes(self):
+        """Nombre de textes valides lus dans le corpus."""
+        return self.ajoutes + self.modifies + self.inchanges
+
+    @property
+    def textes_par_seconde(self):
+        return self.textes / self.duree if self.duree > 0 else 0.0
+
+    def resume(self):
+        lignes = [
+            f"- {self.textes} textes lus : {self.ajoutes} ajoutés, {self.modifies} modifiés, "
+            f"{self.inchanges} inchangés, {self.supprimes} supprimés",
+            f"- {self.qcm} QCM et {self.questions_ouvertes} questions ouvertes écrits",
+            f"- {self.duree:.2f} s, soit {self.textes_par_seconde:,.0f} textes/s",
+        ]
+        if self.rejets:
+            lignes.append(f"- {self.rejets} enregistrements rejetés :")
+            lignes.extend(f"    {erreur}" for erreur in self.erreurs)
+        return "\n".join(lignes)
+
+
+def _lire_jsonl(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, start=1):
+            if not ligne.strip():
+                continue
+            try:
+                yield numero, json.loads(ligne), ligne.strip()
+            except json.JSONDecodeError as e:
+                yield numero, ErreurCorpus(chemin, numero, f"JSON invalide ({e.msg})"), None
+
+
+def _lire_csv(chemin):
+    # Une ligne par texte ; les colonnes qcm et questions_ouvertes contiennent du JSON
+    with open(chemin, encoding="utf-8", newline="") as f:
+        for numero, ligne in enumerate(csv.DictReader(f), start=2):
+            brut = "\x1f".join(f"{cle}={valeur}" for cle, valeur in ligne.items())
+            try:
+                for colonne in ("qcm", "questions_ouvertes"):
+                    ligne[colonne] = json.loads(ligne.get(colonne) or "[]")
+            except json.JSONDecodeError as e:
+                yield numero, ErreurCorpus(chemin, numero, f"colonne {colonne} : JSON invalide ({e.msg})"), None
+                continue
+            yield numero, ligne, brut
+
+
+def lire_corpus(chemin):
+    """Parcourt un fichier de corpus (.jsonl ou .csv) enregistrement par enregistrement.
+
+    Le fichier n'est jamais chargé entièrement en mémoire.
+
+    Yields:
+        Des triplets (numéro de ligne, enregistrement ou ErreurCorpus, texte
+        source de l'enregistrement)
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return _lire_jsonl(chemin)
+    if extension == ".csv":
+        return _lire_csv(chemin)
+    raise ValueError(f"Format de corpus non reconnu : {chemin} (attendu .jsonl ou .csv)")
+
+
+def _texte_requis(enregistrement, champ, source, numero):
+    valeur = enregistrement.get(champ)
+    if not isinstance(valeur, str) or not valeur.strip():
+        raise ErreurCorpus(source, numero, f"champ « {champ} » manquant ou vide")
+    return valeur.strip()
+
+
+def _ordre(valeur, source, numero):
+    try:
+        ordre = int(valeur if valeur is not None else 1)
+    except (TypeError, ValueError):
+        raise ErreurCorpus(source, numero, f"ordre_difficulte invalide : {valeur!r}")
+    if ordre < 1:
+        raise ErreurCorpus(source, numero, f"ordre_difficulte invalide : {valeur!r}")
+    return ordre
+
+
+def valider_enregistrement(enregistrement, source="corpus", numero=0):
+    """Vérifie un enregistrement de corpus et le normalise.
+
+    Returns:
+        Un dict avec les champs du texte, la liste des QCM (question, a, b, c,
+        réponse, ordre) et la liste des questions ouvertes (question,
+        proposition, ordre)
+
+    Raises:
+        ErreurCorpus: si l'enregistrement est incomplet ou incohérent
+    """
+    if not isinstance(enregistrement, dict):
+        raise ErreurCorpus(source, numero, "un objet est attendu")
+
+    niveau = _texte_requis(enregistrement, "niveau", source, numero)
+    if niveau not in NIVEAUX:
+        raise ErreurCorpus(source, numero, f"niveau inconnu : {niveau!r}")
+
+    texte = {
+        "niveau": niveau,
+        "titre": _texte_requis(enregistrement, "titre", source, numero),
+        "texte": _texte_requis(enregistrement, "texte", source, numero),
+        "theme": (enregistrement.get("theme") or "").strip(),
+        "difficulte": (enregistrement.get("difficulte") or "").strip(),
+        "image": (enregistrement.get("image") or "").strip() or None,
+    }
+    texte["nb_mots"] = compter_mots(texte["texte"])
+
+    qcm = []
+    for q in enregistrement.get("qcm") or []:
+        options = q.get("options") if isinstance(q, dict) else None
+        if not isinstance(options, list) or len(options) != 3:
+            raise ErreurCorpus(source, numero, "chaque QCM doit avoir exactement 3 options")
+        question = _texte_requis(q, "question", source, numero)
+        reponse = _texte_requis(q, "reponse_correcte", source, numero)
+        if reponse not in options:
+            raise ErreurCorpus(source, numero, f"réponse absente des options : {reponse!r}")
+        qcm.append((question, *options, reponse, _ordre(q.get("ordre_difficulte"), source, numero)))
+
+    questions_ouvertes = []
+    for q in enregistrement.get("questions_ouvertes") or []:
+        if not isinstance(q, dict):
+            raise ErreurCorpus(source, numero, "question ouverte invalide")
+        questions_ouvertes.append((
+            _texte_requis(q, "question", source, numero),
+            _texte_requis(q, "proposition_reponse", source, numero),
+            _ordre(q.get("ordre_difficulte"), source, numero),
+        ))
+
+    texte["qcm"] = qcm
+    texte["questions_ouvertes"] = questions_ouvertes
+    texte["cle"] = cle_naturelle(enregistrement)
+    return texte
+
+
+def cle_naturelle(enregistrement):
+    """Clé stable d'un texte : le champ « cle » s'il est fourni, sinon « niveau:titre »."""
+    cle = enregistrement.get("cle")
+    if cle not in (None, ""):
+        return str(cle).strip()
+    niveau, titre = enregistrement.get("niveau"), enregistrement.get("titre")
+    if not isinstance(niveau, str) or not isinstance(titre, str):
+        return None
+    return f"{niveau.strip()}:{titre.strip()}"
+
+
+def empreinte(brut):
+    """Empreinte SHA-256 du texte source d'un enregistrement."""
+    return hashlib.sha256(brut.encode("utf-8")).hexdigest()
+
+
+def _textes_existants():
+    """Renvoie {clé naturelle: (id, empreinte)} pour les textes déjà en base,
+    et la liste des identifiants des textes sans clé naturelle."""
+    existants, sans_cle = {}, []
+    with connexion_lecture() as conn:
+        for cle, texte_id, empreinte in conn.execute("SELECT cle, id, empreinte FROM textes"):
+            if cle is None:
+                sans_cle.append(texte_id)
+            else:
+                existants[cle] = (texte_id, empreinte)
+    return existants, sans_cle
+
+
+def _ecrire_lot(nouveaux, modifies, rapport):
+    """Écrit un lot de textes nouveaux ou modifiés en une seule transaction.
+
+    Les textes modifiés gardent leur identifiant (les résultats qui y font
+    référence restent valides) ; leurs questions sont remplacées. Les
+    identifiants des nouveaux textes sont attribués ici, sous le verrou
+    d'écriture, pour pouvoir insérer leurs questions avec executemany.
+    """
+    with connexion_ecriture() as conn:
+        dernier_id = conn.execute("""
+            SELECT MAX(
+                COALESCE((SELECT MAX(id) FROM textes), 0),
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'textes'), 0)
+            )
+        """).fetchone()[0]
+
+        lignes_textes, lignes_qcm, lignes_questions = [], [], []
+        textes_ids = list(enumerate(nouveaux, start=dernier_id + 1))
+        for texte_id, texte in textes_ids:
+            lignes_textes.append((
+                texte_id, texte["niveau"], texte["titre"], texte["texte"], texte["nb_mots"], texte["theme"],
+                texte["difficulte"], texte["image"], texte["cle"], texte["empreinte"]
+            ))
+
+        lignes_modifiees = []
+        for texte_id, texte in modifies:
+            lignes_modifiees.append((
+                texte["niveau"], texte["titre"], texte["texte"], texte["nb_mots"], texte["theme"],
+                texte["difficulte"], texte["image"], texte["empreinte"], texte_id
+            ))
+            textes_ids.append((texte_id, texte))
+
+        for texte_id, texte in textes_ids:
+            lignes_qcm.extend((texte_id, *q) for q in texte["qcm"])
+            lignes_questions.extend((texte_id, *q) for q in texte["questions_ouvertes"])
+
+        conn.executemany("""
+            INSERT INTO textes (id, niveau, titre, texte, nb_mots, theme, difficulte, image_path, cle, empreinte)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, lignes_textes)
+        conn.executemany("""
+            UPDATE textes
+            SET niveau = ?, titre = ?, texte = ?, nb_mots = ?, theme = ?, difficulte = ?, image_path = ?, empreinte = ?
+            WHERE id = ?
+        """, lignes_modifiees)
+        ids_modifies = [(texte_id,) for texte_id, _ in modifies]
+        conn.executemany("DELETE FROM qcm WHERE texte_id = ?", ids_modifies)
+        conn.executemany("DELETE FROM questions_ouvertes WHERE texte_id = ?", ids_modifies)
+        conn.executemany("""
+            INSERT INTO qcm (texte_id, question, option_a, option_b, option_c, reponse_correcte, ordre_difficulte)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, lignes_qcm)
+        conn.executemany("""
+            INSERT INTO questions_ouvertes (texte_id, question, proposition_reponse, ordre_difficulte)
+            VALUES (?, ?, ?, ?)
+        """, lignes_questions)
+
+    rapport.ajoutes += len(nouveaux)
+    rapport.modifies += len(modifies)
+    rapport.qcm += len(lignes_qcm)
+    rapport.questions_ouvertes += len(lignes_questions)
+
+
+def _supprimer_textes(ids, rapport):
+    """Supprime des textes et leurs questions (les résultats sont conservés)."""
+    for debut in range(0, len(ids), TAILLE_LOT):
+        lot = [(texte_id,) for texte_id in ids[debut:debut + TAILLE_LOT]]
+        with connexion_ecriture() as conn:
+            conn.executemany("DELETE FROM qcm WHERE texte_id = ?", lot)
+            conn.executemany("DELETE FROM questions_ouvertes WHERE texte_id = ?", lot)
+            conn.executemany("DELETE FROM textes WHERE id = ?", lot)
+        rapport.supprimes += len(lot)
+
+
+def ingerer(chemins, taille_lot=TAILLE_LOT, synchroniser=False):
+    """Importe dans la base les textes de un ou plusieurs fichiers de corpus.
+
+    Chaque texte est identifié par sa clé naturelle (champ « cle », ou
+    « niveau:titre ») et une empreinte de sa ligne source : seuls les textes
+    nouveaux ou modifiés sont écrits, un texte modifié garde son identifiant.
+    Relancer l'import d'un corpus inchangé n'écrit donc rien.
+
+    Les enregistrements sont lus en flux et écrits par lots de taille_lot.
+    Les enregistrements invalides sont ignorés et signalés dans le rapport.
+
+    Args:
+        chemins: Fichiers .jsonl ou .csv à importer
+        taille_lot: Nombre de textes écrits par transaction
+        synchroniser: Si True, supprime aussi les textes absents du corpus
+                      (sauf si des enregistrements ont été rejetés)
+
+    Returns:
+        Un RapportIngestion
+    """
+    rapport = RapportIngestion()
+    debut = time.perf_counter()
+    existants, sans_cle = _textes_existants()
+    vus = set()
+    nouveaux, modifies = [], []
+
+    for chemin in chemins:
+        for numero, enregistrement, brut in lire_corpus(chemin):
+            try:
+                if isinstance(enregistrement, ErreurCorpus):
+                    raise enregistrement
+                cle = cle_naturelle(enregistrement) if isinstance(enregistrement, dict) else None
+                if cle in vus:
+                    raise ErreurCorpus(chemin, numero, f"clé en double : {cle!r}")
+
+                # Chemin rapide : texte source identique à celui déjà importé
+                existant = existants.get(cle)
+                signature = empreinte(brut)
+                if existant is not None and existant[1] == signature:
+                    vus.add(cle)
+                    rapport.inchanges += 1
+                    continue
+
+                texte = valider_enregistrement(enregistrement, chemin, numero)
+                texte["empreinte"] = signature
+            except ErreurCorpus as e:
+                rapport.rejets += 1
+                if len(rapport.erreurs) < MAX_ERREURS_AFFICHEES:
+                    rapport.erreurs.append(str(e))
+                continue
+
+            vus.add(cle)
+            if existant is None:
+                nouveaux.append(texte)
+            else:
+                modifies.append((existant[0], texte))
+
+            if len(nouveaux) + len(modifies) >= taille_lot:
+                _ecrire_lot(nouveaux, modifies, rapport)
+                nouveaux, modifies = [], []
+
+    if nouveaux or modifies:
+        _ecrire_lot(nouveaux, modifies, rapport)
+
+    if synchroniser and not rapport.rejets:
+        absents = [texte_id for cle, (texte_id, _) in existants.items() if cle not in vus]
+        _supprimer_textes(sans_cle + absents, rapport)
+
+    rapport.duree = time.perf_counter() - debut
+    return rapport
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Importe des fichiers de corpus (JSON Lines ou CSV) dans lecture.db.")
+    parser.add_argument("fichiers", nargs="+", help="fichiers .jsonl ou .csv à importer")
+    parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="textes par transaction")
+    parser.add_argument("--sync", action="store_true",
+                        help="supprimer de la base les textes absents des fichiers")
+    args = parser.parse_args(arguments)
+
+    from migrations import migrer
+    migrer()
+
+    rapport = ingerer(args.fichiers, taille_lot=args.taille_lot, synchroniser=args.sync)
+    print("Import terminé :")
+    print(rapport.resume())
+    return 1 if rapport.rejets else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import logging
+import math
+import re
+
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+# Estimation sans tokenizer : un jeton pour 3,5 caractères environ en français
+# (Llama, Mistral et Gemma donnent entre 3 et 4), soit 1,6 jeton par mot
+CARACTERES_PAR_JETON = 3.5
+JETONS_PAR_MOT = 1.6
+
+# Jetons ajoutés par message (rôle, séparateurs du format de conversation)
+JETONS_PAR_MESSAGE = 4
+
+# Marge au-dessus de la longueur cible : le modèle la dépasse souvent un peu
+MARGE_LONGUEUR = 1.5
+
+# Réponse JSON hors texte : clés, 3 QCM et 2 questions ouvertes
+JETONS_QUESTIONS = 450
+
+_NOMBRE = re.compile(r"\d+")
+_ESPACES = re.compile(r"[ \t]+")
+_LIGNES_VIDES = re.compile(r"\n\s*\n+")
+
+
+def estimer_jetons(texte):
+    """Nombre approximatif de jetons d'un texte."""
+    return math.ceil(len(texte) / CARACTERES_PAR_JETON) if texte else 0
+
+
+def estimer_messages(messages):
+    """Nombre approximatif de jetons d'une requête (tous ses messages)."""
+    return sum(estimer_jetons(message["content"]) + JETONS_PAR_MESSAGE for message in messages)
+
+
+def jetons_texte(longueur):
+    """Jetons d'un texte de longueur « 100 à 150 mots » (borne haute, avec la marge)."""
+    mots = max((int(nombre) for nombre in _NOMBRE.findall(longueur)), default=150)
+    return math.ceil(mots * MARGE_LONGUEUR * JETONS_PAR_MOT)
+
+
+def budget_reponse(longueur, questions=True):
+    """max_tokens d'une génération : le texte, plus ses questions si elles sont demandées."""
+    return jetons_texte(longueur) + (JETONS_QUESTIONS if questions else 0)
+
+
+def budget_modification(texte, longueur):
+    """max_tokens d'une modification : le texte réécrit en entier, même s'il dépasse la longueur cible."""
+    return max(budget_reponse(longueur), math.ceil(estimer_jetons(texte) * MARGE_LONGUEUR) + JETONS_QUESTIONS)
+
+
+def compacter(texte):
+    """Retire les espaces et lignes vides en trop d'un texte à modifier (sans rien couper)."""
+    return _LIGNES_VIDES.sub("\n\n", _ESPACES.sub(" ", texte)).strip()
+
+
+def noter_requete(nom, messages, max_jetons, jetons_reponse):
+    """Journalise les jetons estimés d'une requête et les ajoute aux métriques.
+
+    Les séries jetons.<nom>.prompt et jetons.<nom>.reponse servent à régler
+    les budgets (voir aussi client_ia.jetons_*, les comptes du fournisseur).
+    """
+    prompt = estimer_messages(messages)
+    METRIQUES.observer(f"jetons.{nom}.prompt", prompt)
+    METRIQUES.observer(f"jetons.{nom}.reponse", jetons_reponse)
+    logger.info("Jetons (%s) : ~%d envoyés, ~%d reçus sur %d au plus", nom, prompt, jetons_reponse, max_jetons)
@@ -0,0 +1,68 @@
+import threading
+from collections import defaultdict, deque
+
+# Nombre de mesures conservées par série (fenêtre glissante)
+TAILLE_FENETRE = 1000
+
+
+class Metriques:
+    """Compteurs et mesures du processus, partagés par toutes les sessions."""
+
+    def __init__(self, taille_fenetre=TAILLE_FENETRE):
+        self._verrou = threading.Lock()
+        self._compteurs = defaultdict(int)
+        self._mesures = defaultdict(lambda: deque(maxlen=taille_fenetre))
+        self._jauges = {}
+
+    def incrementer(self, nom, n=1):
+        with self._verrou:
+            self._compteurs[nom] += n
+
+    def observer(self, nom, valeur):
+        """Ajoute une mesure (une durée en secondes, par exemple) à la série nom."""
+        with self._verrou:
+            self._mesures[nom].append(valeur)
+
+    def jauge(self, nom, valeur):
+        """Fixe la valeur courante d'une jauge (taille d'une file, par exemple)."""
+        with self._verrou:
+            self._jauges[nom] = valeur
+
+    def compteur(self, nom):
+        with self._verrou:
+            return self._compteurs.get(nom, 0)
+
+    def taille(self, nom):
+        """Nombre de mesures conservées dans la série nom."""
+        with self._verrou:
+            return len(self._mesures.get(nom, ()))
+
+    def centile(self, nom, p):
+        """Renvoie le centile p (entre 0 et 100) de la série nom, ou None si elle est vide."""
+        with self._verrou:
+            valeurs = sorted(self._mesures.get(nom, ()))
+        if not valeurs:
+            return None
+        rang = min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))
+        return valeurs[rang]
+
+    def instantane(self):
+        """Copie de toutes les métriques, pour affichage ou export."""
+        with self._verrou:
+            series = {nom: sorted(valeurs) for nom, valeurs in self._mesures.items() if valeurs}
+            resultat = {
+                "compteurs": dict(self._compteurs),
+                "jauges": dict(self._jauges),
+                "mesures": {},
+            }
+        for nom, valeurs in series.items():
+            resultat["mesures"][nom] = {
+                "n": len(valeurs),
+                "p50": valeurs[len(valeurs) // 2],
+                "p90": valeurs[min(len(valeurs) - 1, int(len(valeurs) * 0.9))],
+                "max": valeurs[-1],
+            }
+        return resultat
+
+
+METRIQUES = Metriques()
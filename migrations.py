@@ -0,0 +1,216 @@
+# Migrations versionnées du schéma de lecture.db.
+#
+# La version du schéma est stockée dans PRAGMA user_version. Chaque migration
+# est appliquée dans sa propre transaction avec la mise à jour de user_version :
+# une migration interrompue est annulée entièrement, et les données existantes
+# (notamment l'historique des résultats) ne sont jamais supprimées.
+#
+# Pour faire évoluer le schéma, ajouter une fonction en fin de liste MIGRATIONS ;
+# ne jamais modifier une migration déjà déployée.
+import sqlite3
+
+from base_donnees import connexion_ecriture, connexion_lecture
+from tokenisation import compter_mots
+
+# Tables de contenu dont toute modification doit invalider les caches de lecture
+TABLES_CONTENU = ("textes", "qcm", "questions_ouvertes")
+
+_version_appliquee = None
+
+
+def _schema_initial(conn):
+    """Tables d'origine (IF NOT EXISTS : adopte les bases créées avant les migrations)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS textes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            niveau TEXT NOT NULL,
+            titre TEXT NOT NULL,
+            texte TEXT NOT NULL,
+            theme TEXT,
+            difficulte TEXT,
+            image_path TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qcm (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            texte_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            option_a TEXT NOT NULL,
+            option_b TEXT NOT NULL,
+            option_c TEXT NOT NULL,
+            reponse_correcte TEXT NOT NULL,
+            ordre_difficulte INTEGER DEFAULT 1,
+            FOREIGN KEY (texte_id) REFERENCES textes(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS questions_ouvertes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            texte_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            proposition_reponse TEXT NOT NULL,
+            ordre_difficulte INTEGER DEFAULT 1,
+            FOREIGN KEY (texte_id) REFERENCES textes(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resultats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            texte_id INTEGER NOT NULL,
+            date_lecture TEXT NOT NULL,
+            temps_secondes REAL,
+            mots_lus INTEGER,
+            mots_par_minute REAL,
+            FOREIGN KEY (texte_id) REFERENCES textes(id)
+        )
+    """)
+
+
+def _suivi_version_contenu(conn):
+    """Compteur version_contenu, incrémenté par trigger à chaque modification
+    des tables de contenu (mais pas de resultats)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            cle TEXT PRIMARY KEY,
+            valeur INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO meta (cle, valeur) VALUES ('version_contenu', 0)")
+    for table in TABLES_CONTENU:
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS version_{table}_{operation.lower()}
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE meta SET valeur = valeur + 1 WHERE cle = 'version_contenu';
+                END
+            """)
+
+
+def _index_lecture(conn):
+    """Index des requêtes de l'application (questions d'un texte, liste par
+    niveau, historique d'un texte)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_qcm_texte ON qcm (texte_id, ordre_difficulte)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_ouvertes_texte ON questions_ouvertes (texte_id, ordre_difficulte)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_textes_niveau ON textes (niveau, difficulte)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultats_texte ON resultats (texte_id, date_lecture)")
+
+
+def _cle_et_empreinte_textes(conn):
+    """Clé naturelle et empreinte du contenu, pour la synchronisation
+    incrémentale du corpus (voir ingestion.py)."""
+    conn.execute("ALTER TABLE textes ADD COLUMN cle TEXT")
+    conn.execute("ALTER TABLE textes ADD COLUMN empreinte TEXT")
+    # Clé par défaut « niveau:titre » ; en cas de doublon, seul le premier texte
+    # la reçoit (les autres seront remplacés à la prochaine synchronisation)
+    conn.execute("""
+        UPDATE textes SET cle = niveau || ':' || titre
+        WHERE id IN (SELECT MIN(id) FROM textes GROUP BY niveau, titre)
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_textes_cle ON textes (cle)")
+
+
+def _idempotence_resultats(conn):
+    """Clé d'idempotence des résultats : un même résultat n'est écrit qu'une
+    fois, même s'il est soumis plusieurs fois (NULL pour l'historique)."""
+    conn.execute("ALTER TABLE resultats ADD COLUMN cle_idempotence TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resultats_cle ON resultats (cle_idempotence)")
+
+
+def _nombre_de_mots_textes(conn):
+    """Nombre de mots de chaque texte, calculé une fois pour toutes (les
+    nouveaux textes le reçoivent à l'import)."""
+    conn.execute("ALTER TABLE textes ADD COLUMN nb_mots INTEGER")
+    conn.executemany(
+        "UPDATE textes SET nb_mots = ? WHERE id = ?",
+        ((compter_mots(texte), texte_id) for texte_id, texte in conn.execute("SELECT id, texte FROM textes").fetchall())
+    )
+
+
+def _cache_generations(conn):
+    """Textes déjà générés par l'IA, réutilisés pour une même demande (voir
+    cache_generations.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS generations (
+            cle TEXT PRIMARY KEY,
+            age TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            modele TEXT NOT NULL,
+            texte TEXT NOT NULL,
+            nb_mots INTEGER NOT NULL,
+            cree_le REAL NOT NULL,
+            utilise_le REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_generations_utilisation ON generations (utilise_le)")
+
+
+def _questions_generations(conn):
+    """Questions de compréhension générées avec chaque texte (JSON, voir
+    exercices.py ; NULL pour les textes générés avant)."""
+    conn.execute("ALTER TABLE generations ADD COLUMN questions TEXT")
+
+
+# Liste ordonnée : la migration d'indice i amène le schéma à la version i + 1
+MIGRATIONS = [
+    _schema_initial,
+    _suivi_version_contenu,
+    _index_lecture,
+    _cle_et_empreinte_textes,
+    _idempotence_resultats,
+    _nombre_de_mots_textes,
+    _cache_generations,
+    _questions_generations,
+]
+
+VERSION_SCHEMA = len(MIGRATIONS)
+
+
+def version_schema(conn):
+    """Renvoie la version du schéma (PRAGMA user_version) de la base."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrer():
+    """Amène la base à la dernière version du schéma.
+
+    Sans effet (et sans accès disque) une fois la base à jour dans ce processus.
+    Plusieurs processus peuvent migrer en même temps : la version est relue
+    une fois le verrou d'écriture obtenu, donc chaque migration ne s'applique
+    qu'une fois.
+
+    Returns:
+        La liste des versions appliquées par cet appel
+    """
+    global _version_appliquee
+    if _version_appliquee == VERSION_SCHEMA:
+        return []
+
+    with connexion_lecture() as conn:
+        version = version_schema(conn)
+
+    appliquees = []
+    while version < VERSION_SCHEMA:
+        with connexion_ecriture() as conn:
+            version = version_schema(conn)
+            if version >= VERSION_SCHEMA:
+                break
+            MIGRATIONS[version](conn)
+            # PRAGMA n'accepte pas de paramètre lié ; la valeur est un entier interne
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+        version += 1
+        appliquees.append(version)
+
+    if version > VERSION_SCHEMA:
+        raise sqlite3.DatabaseError(
+            f"Schéma de lecture.db en version {version}, plus récent que "
+            f"cette application (version {VERSION_SCHEMA})."
+        )
+
+    if appliquees:
+        with connexion_ecriture() as conn:
+            conn.execute("PRAGMA optimize")
+
+    _version_appliquee = version
+    return appliquees
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Lexique de modération : mots interdits par catégorie et textes de secours, par langue
+CHEMIN_LEXIQUE = os.environ.get(
+    "LECTURE_LEXIQUE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "lexique.json")
+)
+
+LOCALE_PAR_DEFAUT = "fr"
+
+# Intervalle minimal entre deux vérifications du fichier de lexique (secondes)
+INTERVALLE_VERIFICATION = 2.0
+
+# Ligatures non décomposées par la normalisation Unicode
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss"})
+
+# Signes diacritiques combinants (accents, trémas, cédilles) après décomposition
+_DIACRITIQUES = re.compile(r"[\u0300-\u036f]")
+
+# Lettres isolées séparées par des points, tirets, étoiles ou espaces :
+# « m.e.r.d.e », « c-o-n », « p u t e » (au moins trois lettres)
+_LETTRES_ESPACEES = re.compile(r"(?<![^\W_])(?:[^\W_][.\-_*·\s]+){2,}[^\W_](?![^\W_])")
+_SEPARATEURS = re.compile(r"[.\-_*·\s]+")
+
+# Apostrophes d'élision (« l'arme », « qu'un ») : elles séparent deux mots,
+# comme dans tokenisation.py ; ailleurs (« aujourd'hui ») elles les lient
+_ELISION = re.compile(r"\b(?:jusqu|lorsqu|puisqu|quoiqu|qu|[cdjlmnst])['’]")
+
+# Bornes d'un mot entier : un tiret ou une apostrophe entre deux lettres fait
+# partie du mot (« nique » n'est pas un mot entier dans « pique-nique »)
+_DEBUT_MOT = r"(?<![^\W_])(?<![^\W_][-'’])"
+_FIN_MOT = r"(?![^\W_])(?![-'’][^\W_])"
+
+
+def replier(texte):
+    """Normalise un texte pour la comparaison : minuscules, sans accents ni ligatures.
+
+    « Cocaïne » et « HÉROÏNE » deviennent « cocaine » et « heroine ».
+    """
+    texte = texte.lower()
+    if texte.isascii():
+        return texte
+    texte = unicodedata.normalize("NFKD", texte).translate(_LIGATURES)
+    return _DIACRITIQUES.sub("", texte)
+
+
+def _recoller_lettres(texte):
+    return _LETTRES_ESPACEES.sub(lambda m: _SEPARATEURS.sub("", m.group()), texte)
+
+
+def _separer_elisions(texte):
+    return _ELISION.sub(lambda m: m.group()[:-1] + " ", texte)
+
+
+def _preparer(texte):
+    """Texte replié tel que le détecteur le lit : élisions séparées, lettres espacées recollées."""
+    return _recoller_lettres(_separer_elisions(replier(texte)))
+
+
+def _motif_trie(noeud):
+    """Traduit un arbre de préfixes en expression régulière.
+
+    Les mots qui partagent un préfixe partagent la même branche : à chaque
+    position du texte, le moteur ne suit que la branche du caractère lu, au
+    lieu d'essayer chaque mot de la liste l'un après l'autre.
+    """
+    branches = [re.escape(c) + _motif_trie(suite) for c, suite in sorted(noeud.items()) if c]
+    if not branches:
+        return ""
+    fin_de_mot = "" in noeud
+    if len(branches) == 1 and not fin_de_mot:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")" + ("?" if fin_de_mot else "")
+
+
+def compiler_lexique(mots):
+    """Compile une liste de mots en une seule expression régulière.
+
+    Les mots sont repliés (sans accents) et rangés dans un arbre de préfixes,
+    puis traduits en une expression qui ne reconnaît que des mots entiers.
+    Le coût d'une recherche dépend de la longueur du texte et très peu du
+    nombre de mots de la liste.
+
+    Returns:
+        Une expression compilée, à appliquer sur un texte replié
+    """
+    trie = {}
+    for mot in mots:
+        mot = replier(mot).strip()
+        if not mot:
+            continue
+        noeud = trie
+        for caractere in mot:
+            noeud = noeud.setdefault(caractere, {})
+        noeud[""] = {}
+
+    motif = _motif_trie(trie)
+    if not motif:
+        return re.compile(r"(?!)")
+    return re.compile(_DEBUT_MOT + motif + _FIN_MOT)
+
+
+def compiler_expressions(expressions):
+    """Compile les expressions autorisées (« frapper à la porte ») en une expression régulière.
+
+    Returns:
+        Une expression compilée, à appliquer sur un texte préparé, ou None
+        s'il n'y a pas d'expression
+    """
+    motifs = {r"\s+".join(map(re.escape, _separer_elisions(replier(expression)).split()))
+              for expression in expressions}
+    motifs.discard("")
+    if not motifs:
+        return None
+    return re.compile(_DEBUT_MOT + "(?:" + "|".join(sorted(motifs, key=len, reverse=True)) + ")" + _FIN_MOT)
+
+
+class Detecteur:
+    """Détecteur de mots interdits, compilé une fois pour toute une liste.
+
+    Les mots interdits qui font partie d'une expression autorisée (« frapper »
+    dans « frapper à la porte ») sont ignorés.
+    """
+
+    def __init__(self, mots, autorisees=()):
+        self.mots = tuple(mots)
+        self.autorisees = tuple(autorisees)
+        self._expression = compiler_lexique(self.mots)
+        self._autorisees = compiler_expressions(self.autorisees)
+        # Mots qu'une expression autorisée peut compter après un mot interdit
+        self.mots_retenus = max((len(expression.split()) - 1 for expression in self.autorisees), default=0)
+
+    def chercher(self, texte, suite=""):
+        """Renvoie le premier mot interdit trouvé (sous sa forme repliée), ou None.
+
+        suite est le texte qui suit, lu seulement pour reconnaître une
+        expression autorisée commencée dans texte ; les mots interdits qu'il
+        contient ne sont pas signalés.
+        """
+        if not texte:
+            return None
+        texte = _preparer(texte)
+        fin = len(texte)
+        if suite:
+            texte += _preparer(suite)
+        if self._autorisees is not None:
+            texte = self._autorisees.sub(lambda m: " " * len(m.group()), texte)
+        trouve = self._expression.search(texte)
+        return trouve.group() if trouve and trouve.start() < fin else None
+
+    def contient(self, texte):
+        return self.chercher(texte) is not None
+
+
+# Texte déjà validé relu avec chaque nouveau morceau, pour reconnaître les
+# lettres espacées (« m e r d e ») réparties sur plusieurs morceaux
+CONTEXTE_FLUX = 64
+
+
+class AnalyseFlux:
+    """Vérifie un texte reçu morceau par morceau (réponse en streaming d'un modèle).
+
+    Un mot coupé entre deux morceaux n'est vérifié qu'une fois complet : seul
+    le texte jusqu'au dernier espace est analysé, le reste attend le morceau
+    suivant. Les derniers mots complets attendent aussi (detecteur.mots_retenus),
+    le temps de savoir s'ils commencent une expression autorisée. ajouter() renvoie la partie nouvellement validée, que l'on peut
+    afficher sans risque ; dès qu'un mot interdit est trouvé, mot_trouve est
+    renseigné et plus rien n'est validé.
+    """
+
+    def __init__(self, detecteur=None):
+        self.detecteur = detecteur or lexique_courant().detecteur
+        self.texte_valide = ""
+        self.mot_trouve = None
+        self._en_attente = ""
+
+    def _valider(self, segment, suite=""):
+        debut = max(0, len(self.texte_valide) - CONTEXTE_FLUX)
+        contexte = self.texte_valide[debut:]
+        if debut and not self.texte_valide[debut - 1].isspace():
+            # Le contexte commence au milieu d'un mot, déjà vérifié en entier :
+            # sa fin (« çon » de « garçon ») serait prise pour un mot complet
+            espace = next((i for i, c in enumerate(contexte) if c.isspace()), len(contexte))
+            contexte = contexte[espace:]
+        self.mot_trouve = self.detecteur.chercher(contexte + segment, suite)
+        if self.mot_trouve:
+            return ""
+        self.texte_valide += segment
+        return segment
+
+    def ajouter(self, fragment):
+        """Ajoute un morceau ; renvoie le texte nouvellement validé (éventuellement vide)."""
+        if self.mot_trouve or not fragment:
+            return ""
+        tampon = self._en_attente + fragment
+        # Fin du texte vérifiable : avant le mot en cours et les mots retenus
+        coupure = len(tampon)
+        for retenu in range(self.detecteur.mots_retenus + 1):
+            while retenu and coupure > 0 and tampon[coupure - 1].isspace():
+                coupure -= 1
+            while coupure > 0 and not tampon[coupure - 1].isspace():
+                coupure -= 1
+        self._en_attente = tampon[coupure:]
+        return self._valider(tampon[:coupure], self._en_attente) if coupure else ""
+
+    def terminer(self):
+        """Valide la fin du texte ; renvoie la dernière partie validée."""
+        if self.mot_trouve:
+            return ""
+        reste, self._en_attente = self._en_attente, ""
+        return self._valider(reste) if reste else ""
+
+
+@dataclass(frozen=True)
+class Lexique:
+    """Version compilée et immuable du fichier de lexique, pour une langue."""
+    version: object
+    locale: str
+    categories: dict
+    textes_secours: dict
+    textes_repli: dict
+    detecteur: Detecteur
+    signature: str
+
+    def categorie(self, mot):
+        """Catégorie d'un mot trouvé par le détecteur (forme repliée)."""
+        for categorie, mots in self.categories.items():
+            if mot in mots:
+                return categorie
+        return None
+
+    def texte_secours(self, mode):
+        return self.textes_secours.get(mode) or next(iter(self.textes_secours.values()), "")
+
+    def texte_repli(self, mode):
+        return self.textes_repli.get(mode) or next(iter(self.textes_repli.values()), "")
+
+
+def compiler_fichier_lexique(contenu, locale=LOCALE_PAR_DEFAUT, signature=""):
+    """Construit un Lexique à partir du contenu JSON du fichier.
+
+    Raises:
+        ValueError: si le fichier est mal formé ou ne contient pas la langue
+    """
+    donnees = json.loads(contenu)
+    try:
+        section = donnees["locales"][locale]
+        categories = {
+            categorie: frozenset(replier(mot).strip() for mot in mots)
+            for categorie, mots in section["mots_interdits"].items()
+        }
+        textes_secours = dict(section["textes_secours"])
+        textes_repli = dict(section["textes_repli"])
+        autorisees = [str(expression) for expression in section.get("expressions_autorisees", [])]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Lexique invalide pour la langue {locale!r} : {e}") from e
+    mots = sorted(set().union(*categories.values()))
+    return Lexique(
+        donnees.get("version"), locale, categories, textes_secours, textes_repli, Detecteur(mots, autorisees), signature
+    )
+
+
+class GestionnaireLexique:
+    """Fournit le lexique compilé courant et le recharge quand le fichier change.
+
+    La vérification du fichier (date de modification et taille, puis empreinte
+    du contenu) se fait au plus toutes les INTERVALLE_VERIFICATION secondes,
+    dans un thread d'arrière-plan : une session ne patiente jamais pendant la
+    compilation. Le nouveau lexique remplace l'ancien d'un seul coup (simple
+    affectation de référence), une fois entièrement compilé ; en cas d'erreur
+    dans le fichier, l'ancien lexique reste en service.
+    """
+
+    def __init__(self, chemin=CHEMIN_LEXIQUE, locale=LOCALE_PAR_DEFAUT, intervalle=INTERVALLE_VERIFICATION):
+        self.chemin = chemin
+        self.locale = locale
+        self.intervalle = intervalle
+        self._lexique = None
+        self._etat_fichier = None
+        self._prochaine_verification = 0.0
+        self._verrou = threading.Lock()
+        self._rechargement = None
+
+    def _lire_etat(self):
+        etat = os.stat(self.chemin)
+        return (etat.st_mtime_ns, etat.st_size)
+
+    def _charger(self):
+        """Relit et recompile le fichier si son contenu a changé."""
+        etat = self._lire_etat()
+        if etat == self._etat_fichier:
+            return
+        with open(self.chemin, "rb") as f:
+            contenu = f.read()
+        signature = hashlib.sha256(contenu).hexdigest()
+        if self._lexique is None or signature != self._lexique.signature:
+            lexique = compiler_fichier_lexique(contenu, self.locale, signature)
+            self._lexique = lexique
+            logger.info("Lexique de modération chargé (version %s)", lexique.version)
+        self._etat_fichier = etat
+
+    def _recharger(self):
+        try:
+            self._charger()
+        except Exception:
+            logger.exception("Lexique %s illisible : la version précédente reste utilisée", self.chemin)
+
+    def courant(self):
+        """Renvoie le lexique en service, sans jamais attendre un rechargement."""
+        if self._lexique is None:
+            # Premier chargement : synchrone, une erreur ici est fatale
+            with self._verrou:
+                if self._lexique is None:
+                    self._charger()
+                    self._prochaine_verification = time.monotonic() + self.intervalle
+            return self._lexique
+
+        maintenant = time.monotonic()
+        if maintenant >= self._prochaine_verification and self._verrou.acquire(blocking=False):
+            try:
+                if self._rechargement is None or not self._rechargement.is_alive():
+                    self._prochaine_verification = maintenant + self.intervalle
+                    self._rechargement = threading.Thread(
+                        target=self._recharger, name="rechargement-lexique", daemon=True
+                    )
+                    self._rechargement.start()
+            finally:
+                self._verrou.release()
+        return self._lexique
+
+
+_gestionnaire = GestionnaireLexique()
+
+
+def lexique_courant():
+    """Renvoie le lexique de modération en service (rechargé à chaud)."""
+    return _gestionnaire.courant()
+
+
+def contient_mot_interdit(texte):
+    """Vérifie si un texte contient un mot interdit (accents et lettres espacées compris)."""
+    return lexique_courant().detecteur.contient(texte)
+
+
+def texte_secours(mode):
+    """Texte de secours du mode demandé (utilisé si la saisie est vide ou refusée)."""
+    return lexique_courant().texte_secours(mode)
+
+
+def texte_repli(mode):
+    """Texte prêt à lire, affiché à la place d'une génération refusée par la modération."""
+    return lexique_courant().texte_repli(mode)
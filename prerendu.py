@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from base_donnees import connexion_lecture
+from illustrations import dessiner, ecrire_atomique, theme_image
+
+# Erreurs détaillées dans le bilan (les suivantes sont seulement comptées)
+MAX_ERREURS_AFFICHEES = 10
+
+
+@dataclass
+class RapportPrerendu:
+    """Bilan d'un pré-rendu : illustrations dessinées, déjà présentes, échecs et débit."""
+    dessinees: int = 0
+    presentes: int = 0
+    echecs: int = 0
+    erreurs: list = field(default_factory=list)
+    duree: float = 0.0
+
+    @property
+    def images_par_seconde(self):
+        return self.dessinees / self.duree if self.duree > 0 else 0.0
+
+    def resume(self):
+        lignes = [
+            f"- {self.dessinees} illustrations dessinées, {self.presentes} déjà présentes",
+            f"- {self.duree:.2f} s, soit {self.images_par_seconde:,.1f} images/s",
+        ]
+        if self.echecs:
+            lignes.append(f"- {self.echecs} illustrations en échec :")
+            lignes.extend(f"    {erreur}" for erreur in self.erreurs)
+        return "\n".join(lignes)
+
+
+def illustrations_des_textes():
+    """Couples (image_path, titre) des textes de la base, un par fichier."""
+    with connexion_lecture() as conn:
+        lignes = conn.execute(
+            "SELECT image_path, titre FROM textes WHERE image_path IS NOT NULL AND image_path != '' ORDER BY id"
+        ).fetchall()
+    return list(dict(lignes).items())
+
+
+def _dessiner(tache):
+    """Dessine et écrit une illustration (dans un processus du pool) ; renvoie l'erreur ou None."""
+    image_path, titre = tache
+    if os.path.exists(image_path):
+        return None
+    try:
+        ecrire_atomique(image_path, dessiner(theme_image(image_path, titre)))
+    except Exception as e:
+        return f"{image_path} : {type(e).__name__} : {e}"
+    return None
+
+
+def prerendre(taches=None, processus=None):
+    """Dessine en parallèle les illustrations manquantes des textes.
+
+    Les fichiers déjà présents (fournis ou dessinés lors d'un passage
+    précédent) ne sont pas touchés : relancer le pré-rendu est sans effet.
+    Les écritures sont atomiques, l'application peut tourner pendant ce temps.
+
+    Args:
+        taches: couples (image_path, titre) ; par défaut, ceux des textes de la base
+        processus: nombre de processus (par défaut, un par cœur)
+
+    Returns:
+        Un RapportPrerendu
+    """
+    rapport = RapportPrerendu()
+    debut = time.perf_counter()
+    if taches is None:
+        taches = illustrations_des_textes()
+    manquantes = [tache for tache in taches if not os.path.exists(tache[0])]
+    rapport.presentes = len(taches) - len(manquantes)
+
+    if manquantes:
+        processus = min(processus or os.cpu_count() or 1, len(manquantes))
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            # Des lots de quelques images : un dessin ne prend que quelques millisecondes
+            lot = max(1, len(manquantes) // (processus * 4))
+            for erreur in pool.map(_dessiner, manquantes, chunksize=lot):
+                if erreur is None:
+                    rapport.dessinees += 1
+                    continue
+                rapport.echecs += 1
+                if len(rapport.erreurs) < MAX_ERREURS_AFFICHEES:
+                    rapport.erreurs.append(erreur)
+
+    rapport.duree = time.perf_counter() - debut
+    return rapport
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Dessine les illustrations manquantes des textes de lecture.db.")
+    parser.add_argument("--processus", type=int, default=None, help="nombre de processus (un par cœur par défaut)")
+    args = parser.parse_args(arguments)
+
+    from migrations import migrer
+    migrer()
+
+    rapport = prerendre(processus=args.processus)
+    print("Pré-rendu terminé :")
+    print(rapport.resume())
+    return 1 if rapport.echecs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from client_ia import GenerationLimitee
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+# Seuils de chaque réserve (âge, mode) : sous BAS, elle est remplie jusqu'à HAUT
+BAS = 2
+HAUT = 5
+
+# Pause minimale entre deux générations d'avance (secondes)
+INTERVALLE = 2.0
+
+# Pauses après un refus pour limite de débit, ou une autre erreur (secondes)
+PAUSE_LIMITE = 60.0
+PAUSE_ERREUR = 10.0
+
+
+class ReserveTextes:
+    """Textes prêts à lire, générés à l'avance pour chaque (âge, mode).
+
+    Un thread d'arrière-plan remplit les réserves une génération à la fois,
+    en passant après les demandes des enfants (occupe() vrai) et en se
+    mettant en pause dès que le fournisseur limite le débit, que le refus
+    vienne de ses propres appels ou de ceux des sessions.
+
+    produire(age, mode) renvoie un ResultatGeneration ; seuls les textes
+    réussis et non modérés entrent dans la réserve.
+    """
+
+    def __init__(self, bas=BAS, haut=HAUT, intervalle=INTERVALLE, occupe=lambda: False):
+        self.bas = bas
+        self.haut = haut
+        self.intervalle = intervalle
+        self._occupe = occupe
+        self._reserves = defaultdict(deque)
+        self._a_remplir = set()
+        self._condition = threading.Condition()
+        self._produire = None
+        self._thread = None
+        self._arret = False
+
+    def demarrer(self, produire, seaux):
+        """Lance le remplissage des réserves seaux (couples âge, mode), une fois par processus."""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._produire = produire
+            self._arret = False
+            for seau in seaux:
+                if len(self._reserves[seau]) < self.haut:
+                    self._a_remplir.add(seau)
+            self._thread = threading.Thread(target=self._boucle, name="reserve-textes", daemon=True)
+            self._thread.start()
+
+    def arreter(self):
+        with self._condition:
+            self._arret = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def prendre(self, age, mode):
+        """Retire un texte de la réserve (âge, mode) ; None si elle est vide."""
+        seau = (age, mode)
+        with self._condition:
+            reserve = self._reserves.get(seau)
+            resultat = reserve.popleft() if reserve else None
+            if reserve is not None and len(reserve) < self.bas:
+                self._a_remplir.add(seau)
+                self._condition.notify_all()
+        METRIQUES.incrementer("reserve.servis" if resultat is not None else "reserve.vide")
+        return resultat
+
+    def niveaux(self):
+        """Nombre de textes prêts, par (âge, mode)."""
+        with self._condition:
+            return {seau: len(reserve) for seau, reserve in self._reserves.items()}
+
+    def _attendre(self, delai):
+        """Attend delai secondes (moins si la réserve est arrêtée) ; renvoie False à l'arrêt."""
+        fin = time.monotonic() + delai
+        with self._condition:
+            # Un texte pris entre-temps réveille le thread : la pause continue
+            while not self._arret and time.monotonic() < fin:
+                self._condition.wait(fin - time.monotonic())
+            return not self._arret
+
+    def _prochain_seau(self):
+        with self._condition:
+            while not self._a_remplir and not self._arret:
+                self._condition.wait()
+            if self._arret:
+                return None
+            # La réserve la plus basse d'abord
+            return min(self._a_remplir, key=lambda seau: len(self._reserves[seau]))
+
+    def _boucle(self):
+        limitees = METRIQUES.compteur("client_ia.GenerationLimitee")
+        while True:
+            seau = self._prochain_seau()
+            if seau is None:
+                return
+            if self._occupe():
+                if not self._attendre(self.intervalle):
+                    return
+                continue
+
+            try:
+                resultat = self._produire(*seau)
+            except Exception:
+                logger.exception("Échec d'une génération d'avance pour %s", seau)
+                resultat = None
+
+            pause = self.intervalle
+            if resultat is not None and resultat.erreur is None and not resultat.moderee:
+                with self._condition:
+                    reserve = self._reserves[seau]
+                    reserve.append(resultat)
+                    if len(reserve) >= self.haut:
+                        self._a_remplir.discard(seau)
+                    METRIQUES.jauge("reserve.textes", sum(len(r) for r in self._reserves.values()))
+            elif isinstance(getattr(resultat, "erreur", None), GenerationLimitee):
+                pause = PAUSE_LIMITE
+            elif resultat is None or resultat.erreur is not None:
+                pause = PAUSE_ERREUR
+            # Un 429 reçu depuis le dernier tour, par la réserve ou par une session
+            if METRIQUES.compteur("client_ia.GenerationLimitee") > limitees:
+                limitees = METRIQUES.compteur("client_ia.GenerationLimitee")
+                pause = max(pause, PAUSE_LIMITE)
+            if pause > self.intervalle:
+                logger.info("Réserve de textes en pause pour %.0f s", pause)
+
+            if not self._attendre(pause):
+                return
@@ -0,0 +1,66 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from illustrations import ecrire_atomique
+
+logger = logging.getLogger(__name__)
+
+# Dossier servi par Streamlit (server.enableStaticServing, voir
+# .streamlit/config.toml) : il doit s'appeler static et être à côté d'app.py
+DOSSIER_STATIQUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+URL_STATIQUE = "app/static"
+
+# Longueur de l'empreinte dans les noms de fichiers (caractères hexadécimaux)
+LONGUEUR_EMPREINTE = 16
+
+# Qualité des versions WebP (les icônes gardent des aplats nets à 85)
+QUALITE_WEBP = 85
+
+
+def empreinte(octets):
+    return hashlib.sha256(octets).hexdigest()[:LONGUEUR_EMPREINTE]
+
+
+def publier(octets, nom, extension, dossier=None):
+    """Publie un fichier sous un nom qui dépend de son contenu ; renvoie son URL.
+
+    Un même contenu donne toujours le même nom : le fichier n'est écrit
+    qu'une fois, et un contenu modifié obtient une nouvelle adresse. Le
+    paramètre v de l'URL demande au serveur (Tornado, sous Streamlit) un
+    en-tête de cache longue durée, sans risque puisque l'adresse ne sert
+    jamais pour un autre contenu.
+    """
+    cle = empreinte(octets)
+    fichier = f"{nom}-{cle}.{extension}"
+    chemin = os.path.join(dossier or DOSSIER_STATIQUE, fichier)
+    if not os.path.exists(chemin):
+        ecrire_atomique(chemin, octets)
+    return f"{URL_STATIQUE}/{fichier}?v={cle}"
+
+
+def en_webp(octets):
+    """Version WebP d'une image (en général deux à trois fois plus légère que le PNG)."""
+    from PIL import Image
+
+    with Image.open(BytesIO(octets)) as image:
+        sortie = BytesIO()
+        image.save(sortie, format="WEBP", quality=QUALITE_WEBP, method=6)
+    return sortie.getvalue()
+
+
+def publier_image(octets, nom, dossier=None):
+    """Publie une image PNG et sa version WebP ; renvoie (url_png, url_webp).
+
+    url_webp vaut None si la conversion échoue. Lève OSError si le dossier
+    statique n'est pas accessible en écriture.
+    """
+    try:
+        webp = en_webp(octets)
+    except Exception:
+        logger.exception("Version WebP de %s impossible à produire", nom)
+        webp = None
+    url_png = publier(octets, nom, "png", dossier)
+    url_webp = publier(webp, nom, "webp", dossier) if webp is not None else None
+    return url_png, url_webp
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from base_donnees import connexion_ecriture
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de résultats en attente d'écriture
+TAILLE_FILE = 1000
+
+# Nombre maximal de résultats écrits par transaction
+TAILLE_LOT = 200
+
+# Temps laissé aux autres résultats pour rejoindre un lot (secondes)
+DELAI_LOT = 0.05
+
+# Attente maximale quand la file est pleine, avant d'écrire directement (secondes)
+DELAI_FILE_PLEINE = 0.5
+
+_REQUETE_INSERTION = """
+    INSERT OR IGNORE INTO resultats
+        (cle_idempotence, texte_id, date_lecture, temps_secondes, mots_lus, mots_par_minute)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_FIN = object()
+
+
+def _ecrire(lignes):
+    """Écrit des résultats en une transaction ; les doublons de clé sont ignorés."""
+    with connexion_ecriture() as conn:
+        conn.executemany(_REQUETE_INSERTION, lignes)
+
+
+class FileResultats:
+    """Écriture différée des résultats de lecture par un thread d'arrière-plan.
+
+    Le script Streamlit se contente de déposer le résultat dans une file
+    bornée ; le thread les regroupe en transactions. Chaque résultat porte une
+    clé d'idempotence (colonne resultats.cle_idempotence, unique) : un même
+    résultat déposé plusieurs fois, par exemple lors de reruns, n'est écrit
+    qu'une fois.
+    """
+
+    def __init__(self, taille_file=TAILLE_FILE, taille_lot=TAILLE_LOT, delai_lot=DELAI_LOT):
+        self.taille_lot = taille_lot
+        self.delai_lot = delai_lot
+        self._file = queue.Queue(maxsize=taille_file)
+        self._verrou = threading.Lock()
+        self._thread = None
+
+    def _demarrer(self):
+        with self._verrou:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._boucle, name="ecriture-resultats", daemon=True)
+                self._thread.start()
+
+    def enregistrer(self, cle, texte_id, temps_secondes, mots_lus, mots_par_minute):
+        """Dépose un résultat à écrire.
+
+        Si la file est pleine, le résultat est écrit directement plutôt que
+        perdu.
+        """
+        ligne = (cle, texte_id, datetime.now().isoformat(), temps_secondes, mots_lus, mots_par_minute)
+        self._demarrer()
+        try:
+            self._file.put(ligne, timeout=DELAI_FILE_PLEINE)
+        except queue.Full:
+            logger.warning("File des résultats pleine : écriture directe")
+            _ecrire([ligne])
+
+    def _boucle(self):
+        while True:
+            premier = self._file.get()
+            if premier is _FIN:
+                self._file.task_done()
+                return
+
+            lot = [premier]
+            fin = False
+            limite = time.monotonic() + self.delai_lot
+            while len(lot) < self.taille_lot:
+                try:
+                    element = self._file.get(timeout=max(0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if element is _FIN:
+                    fin = True
+                    break
+                lot.append(element)
+
+            self._ecrire_lot(lot)
+            for _ in range(len(lot) + fin):
+                self._file.task_done()
+            if fin:
+                return
+
+    def _ecrire_lot(self, lot, tentatives=5):
+        for tentative in range(tentatives):
+            try:
+                _ecrire(lot)
+                return
+            except Exception:
+                logger.exception("Échec d'écriture de %d résultats (tentative %d)", len(lot), tentative + 1)
+                time.sleep(0.2 * 2 ** tentative)
+        logger.error("%d résultats abandonnés après %d tentatives", len(lot), tentatives)
+
+    def vider(self):
+        """Attend que tous les résultats déposés soient écrits."""
+        if self._thread is not None and self._thread.is_alive():
+            self._file.join()
+
+    def arreter(self):
+        """Écrit les résultats en attente puis arrête le thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._file.put(_FIN)
+            self._thread.join()
+
+
+_file_resultats = FileResultats()
+atexit.register(_file_resultats.arreter)
+
+
+def enregistrer_resultat(cle, texte_id, temps_secondes, mots_lus, mots_par_minute):
+    """Dépose un résultat de lecture dans la file d'écriture du processus."""
+    _file_resultats.enregistrer(cle, texte_id, temps_secondes, mots_lus, mots_par_minute)
+
+
+def vider_file():
+    """Attend l'écriture de tous les résultats en attente."""
+    _file_resultats.vider()
@@ -0,0 +1,193 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from client_ia import Annulation, GenerationEchouee
+from disjoncteur import Disjoncteur
+from metriques import METRIQUES
+
+logger = logging.getLogger(__name__)
+
+# Modèles par ordre de préférence (variable LECTURE_MODELES, séparés par des virgules)
+MODELES = tuple(
+    modele.strip()
+    for modele in os.environ.get(
+        "LECTURE_MODELES",
+        "meta-llama/llama-3.2-3b-instruct:free,"
+        "mistralai/mistral-7b-instruct:free,"
+        "google/gemma-2-9b-it:free"
+    ).split(",")
+    if modele.strip()
+)
+
+# Délai avant d'envoyer une requête doublée au modèle suivant : le 90e centile
+# du délai de premier morceau du modèle principal, borné (secondes)
+DELAI_COUVERTURE_DEFAUT = 4.0
+DELAI_COUVERTURE_MIN = 1.0
+DELAI_COUVERTURE_MAX = 8.0
+
+# Mesures nécessaires avant de se fier au centile
+MESURES_MIN = 20
+
+
+class FluxRoute:
+    """Morceaux de texte de la réponse du modèle gagnant.
+
+    modele nomme le modèle qui répond dès son premier morceau (None avant).
+    """
+
+    def __init__(self):
+        self.modele = None
+        self._morceaux = (morceau for morceau in ())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._morceaux)
+
+    def close(self):
+        self._morceaux.close()
+
+
+class RouteurModeles:
+    """Répartit les générations sur une liste ordonnée de modèles.
+
+    La requête part vers le premier modèle disponible. S'il n'a rien
+    répondu au bout du délai de couverture, la même requête est envoyée au
+    modèle suivant : le premier des deux à produire un morceau l'emporte,
+    l'autre est annulé sur-le-champ (sa connexion est coupée). Un modèle en échec passe la main au suivant ; un
+    modèle qui échoue à répétition est écarté par son disjoncteur.
+
+    Les décisions sont comptées dans metriques (routeur.couverture,
+    routeur.couverture_gagnante, routeur.repli, routeur.gagnant.<modèle>) et
+    les délais de chaque modèle y sont mesurés (routeur.<modèle>.premier_morceau).
+    """
+
+    def __init__(self, modeles=MODELES):
+        self.modeles = tuple(modeles)
+        self.disjoncteurs = {modele: Disjoncteur(modele) for modele in self.modeles}
+
+    def delai_couverture(self, modele):
+        """Délai avant la requête doublée : p90 du premier morceau de ce modèle, borné."""
+        serie = f"routeur.{modele}.premier_morceau"
+        if METRIQUES.taille(serie) < MESURES_MIN:
+            return DELAI_COUVERTURE_DEFAUT
+        return min(DELAI_COUVERTURE_MAX, max(DELAI_COUVERTURE_MIN, METRIQUES.centile(serie, 90)))
+
+    def _executer(self, client, modele, messages, options, file, annule):
+        debut = time.perf_counter()
+        flux = client.flux(modele, messages, annulation=annule, **options)
+        premier = True
+        try:
+            for morceau in flux:
+                if annule.is_set():
+                    return
+                if premier:
+                    premier = False
+                    METRIQUES.observer(f"routeur.{modele}.premier_morceau", time.perf_counter() - debut)
+                file.put((modele, "morceau", morceau))
+            METRIQUES.observer(f"routeur.{modele}.duree", time.perf_counter() - debut)
+            file.put((modele, "fin", None))
+        except Exception as e:
+            file.put((modele, "erreur", e))
+        finally:
+            flux.close()
+
+    def flux(self, client, messages, couverture=True, **options):
+        """Génère via le meilleur modèle disponible ; renvoie un FluxRoute.
+
+        couverture=False désactive la requête doublée (générations d'avance,
+        qui ne sont pas pressées).
+
+        Raises:
+            ErreurGeneration: pendant l'itération, si aucun modèle n'a pu répondre
+        """
+        route = FluxRoute()
+        route._morceaux = self._router(route, client, messages, couverture, options)
+        return route
+
+    def _router(self, route, client, messages, couverture, options):
+        restants = list(self.modeles)
+        file = queue.Queue()
+        en_cours = {}
+        derniere_erreur = GenerationEchouee("Aucun modèle disponible (disjoncteurs ouverts)")
+        gagnant = None
+
+        def lancer():
+            """Envoie la requête au prochain modèle que son disjoncteur laisse passer."""
+            while restants:
+                modele = restants.pop(0)
+                if self.disjoncteurs[modele].autorise():
+                    en_cours[modele] = Annulation()
+                    threading.Thread(
+                        target=self._executer, args=(client, modele, messages, options, file, en_cours[modele]),
+                        name="routeur-modele", daemon=True
+                    ).start()
+                    return modele
+            return None
+
+        principal = lancer()
+        couvert = not couverture
+        limite = time.monotonic() + self.delai_couverture(principal) if principal else 0.0
+        try:
+            while True:
+                if gagnant is None and not en_cours:
+                    raise derniere_erreur
+                if gagnant is None and not couvert and restants:
+                    attente = max(0.0, limite - time.monotonic())
+                else:
+                    attente = None
+                try:
+                    modele, nature, valeur = file.get(timeout=attente)
+                except queue.Empty:
+                    # Pas de réponse dans le délai habituel : doubler la requête
+                    couvert = True
+                    if lancer() is not None:
+                        METRIQUES.incrementer("routeur.couverture")
+                        logger.info("Pas de réponse de %s à temps : requête doublée", principal)
+                    continue
+
+                if gagnant is not None and modele != gagnant:
+                    continue
+
+                if nature == "erreur":
+                    del en_cours[modele]
+                    self.disjoncteurs[modele].echec()
+                    if gagnant is not None:
+                        raise valeur
+                    logger.warning("Échec du modèle %s : %s", modele, valeur)
+                    derniere_erreur = valeur
+                    if not en_cours:
+                        principal = lancer()
+                        if principal is not None:
+                            METRIQUES.incrementer("routeur.repli")
+                            limite = time.monotonic() + self.delai_couverture(principal)
+                    continue
+
+                if gagnant is None:
+                    # Premier morceau : ce modèle l'emporte, les autres sont annulés
+                    # (leur connexion est coupée, même s'ils n'ont encore rien envoyé)
+                    gagnant = route.modele = modele
+                    METRIQUES.incrementer(f"routeur.gagnant.{modele}")
+                    if modele != principal:
+                        METRIQUES.incrementer("routeur.couverture_gagnante")
+                    for autre in [autre for autre in en_cours if autre != modele]:
+                        en_cours.pop(autre).set()
+                        self.disjoncteurs[autre].abandon()
+
+                if nature == "fin":
+                    del en_cours[modele]
+                    self.disjoncteurs[modele].succes()
+                    return
+                yield valeur
+        finally:
+            # Génération abandonnée en route : les requêtes encore ouvertes sont annulées
+            for modele, annule in en_cours.items():
+                annule.set()
+                self.disjoncteurs[modele].abandon()
+
+
+ROUTEUR = RouteurModeles()
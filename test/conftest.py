@@ -0,0 +1,22 @@
+import pytest
+
+import base_donnees
+import migrations
+
+
+@pytest.fixture
+def base_vide(tmp_path, monkeypatch):
+    """Chemin d'une lecture.db temporaire, pas encore créée (ni migrée)."""
+    chemin = str(tmp_path / "lecture.db")
+    base_donnees.fermer_connexions()
+    monkeypatch.setattr(base_donnees, "CHEMIN_BASE", chemin)
+    monkeypatch.setattr(migrations, "_version_appliquee", None)
+    yield chemin
+    base_donnees.fermer_connexions()
+
+
+@pytest.fixture
+def base_temporaire(base_vide):
+    """Chemin d'une lecture.db temporaire, au schéma à jour."""
+    migrations.migrer()
+    return base_vide
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+import base_donnees
+from base_donnees import connexion_ecriture, connexion_lecture
+
+
+def test_connexion_de_lecture_reutilisee(base_temporaire):
+    with connexion_lecture() as conn:
+        # Appel imbriqué dans le même thread : la même connexion
+        with connexion_lecture() as imbriquee:
+            assert imbriquee is conn
+    # Rendue au pool, puis prêtée de nouveau au lieu d'être rouverte
+    with connexion_lecture() as suivante:
+        assert suivante is conn
+
+    # Un autre thread, pendant que la connexion est prêtée : une autre connexion
+    autres = []
+
+    def lire():
+        with connexion_lecture() as autre:
+            autres.append(autre)
+
+    with connexion_lecture() as conn:
+        thread = threading.Thread(target=lire)
+        thread.start()
+        thread.join()
+    assert autres[0] is not conn
+
+
+def test_ecriture_annulee_sur_exception(base_temporaire):
+    with pytest.raises(RuntimeError):
+        with connexion_ecriture() as conn:
+            conn.execute("INSERT INTO textes (niveau, titre, texte) VALUES ('CP', 'Annulé', 'Texte.')")
+            raise RuntimeError("échec au milieu de la transaction")
+
+    # La connexion d'écriture reste utilisable après l'annulation
+    with connexion_ecriture() as conn:
+        conn.execute("INSERT INTO textes (niveau, titre, texte) VALUES ('CP', 'Validé', 'Texte.')")
+    with connexion_lecture() as conn:
+        assert [titre for titre, in conn.execute("SELECT titre FROM textes")] == ["Validé"]
+
+
+def test_connexions_reinitialisees_apres_fork(base_temporaire, monkeypatch):
+    with connexion_lecture() as lecture:
+        pass
+    with connexion_ecriture() as ecriture:
+        pass
+
+    # Processus enfant : les connexions héritées du parent ne sont jamais reprises
+    monkeypatch.setattr(base_donnees, "_pid", -1)
+    with connexion_lecture() as conn:
+        assert conn is not lecture
+    with connexion_ecriture() as conn:
+        assert conn is not ecriture
+    assert base_donnees._pid != -1
@@ -0,0 +1,37 @@
+import cache_generations
+from cache_generations import CacheGenerations, cle_generation
+
+
+def test_cle_normalisee():
+    cle = cle_generation("6–7 ans", "Histoire", "Un chat  dans l’espace !", None, "modele")
+    assert cle == cle_generation("6–7 ans", "Histoire", "un chat dans l'espace", None, "modele")
+    assert cle != cle_generation("7–8 ans", "Histoire", "un chat dans l'espace", None, "modele")
+    assert cle != cle_generation("6–7 ans", "Histoire", "un chat dans l'espace", "Il était une fois", "modele")
+
+
+def test_lecture_memoire_puis_base(base_temporaire):
+    cache = CacheGenerations()
+    assert cache.lire("cle") is None
+    cache.enregistrer("cle", "6–7 ans", "Histoire", "modele", "Il était une fois un chat.", 6)
+    assert cache.lire("cle").texte == "Il était une fois un chat."
+
+    # Nouveau processus : la mémoire est vide, le texte vient de la table
+    cache.vider_memoire()
+    succes_base = cache.statistiques()["succes_base"]
+    assert cache.lire("cle").nb_mots == 6
+    assert cache.statistiques()["succes_base"] == succes_base + 1
+
+
+def test_expiration_et_taille_maximale(base_temporaire, monkeypatch):
+    cache = CacheGenerations(duree_vie=60, taille_max=3)
+    maintenant = [1000.0]
+    monkeypatch.setattr(cache_generations.time, "time", lambda: maintenant[0])
+    for i in range(5):
+        maintenant[0] += 1
+        cache.enregistrer(f"cle{i}", "6–7 ans", "Histoire", "modele", f"Texte {i}.", 2)
+    cache.evincer()
+    cache.vider_memoire()
+    assert [cache.lire(f"cle{i}") is not None for i in range(5)] == [False, False, True, True, True]
+
+    maintenant[0] += 120
+    assert cache.lire("cle4") is None
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from client_ia import Annulation, ClientIA, GenerationEchouee, GenerationLente, GenerationLimitee, GenerationTronquee
+
+
+class ServeurFactice(BaseHTTPRequestHandler):
+    """Serveur compatible OpenAI : rejoue les réponses de la liste `scenario`.
+
+    Dans une réponse, un nombre est une pause (secondes) et None la fin
+    imposée par max_tokens (finish_reason « length »).
+    """
+
+    protocol_version = "HTTP/1.1"
+    scenario = []
+    connexions = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).connexions.add(self.client_address)
+        etape = self.scenario.pop(0) if len(self.scenario) > 1 else self.scenario[0]
+        if isinstance(etape, int):
+            corps = json.dumps({"error": {"message": "erreur", "code": etape}}).encode()
+            self.send_response(etape)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corps)))
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(corps)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for morceau in etape:
+            if isinstance(morceau, float):
+                time.sleep(morceau)
+                continue
+            choix = {"index": 0, "delta": {"content": morceau}, "finish_reason": None}
+            if morceau is None:
+                choix = {"index": 0, "delta": {}, "finish_reason": "length"}
+            evenement = {"id": "1", "object": "chat.completion.chunk", "created": 0, "model": "test",
+                         "choices": [choix]}
+            self._envoyer(f"data: {json.dumps(evenement)}\n\n")
+        self._envoyer("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _envoyer(self, texte):
+        donnees = texte.encode()
+        self.wfile.write(f"{len(donnees):x}\r\n".encode() + donnees + b"\r\n")
+        self.wfile.flush()
+
+
+@pytest.fixture
+def serveur():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ServeurFactice)
+    ServeurFactice.connexions = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(url, **options):
+    options.setdefault("delai_base", 0.01)
+    return ClientIA("cle-test", base_url=url, **options)
+
+
+def test_flux_et_connexion_reutilisee(serveur):
+    ServeurFactice.scenario = [["Il était ", "une fois"]]
+    client = _client(serveur)
+    for _ in range(3):
+        assert "".join(client.flux("test", [])) == "Il était une fois"
+    # Les trois requêtes passent par la même connexion gardée ouverte
+    assert len(ServeurFactice.connexions) == 1
+    client.fermer()
+
+
+def test_nouvelles_tentatives_sur_429_et_5xx(serveur):
+    ServeurFactice.scenario = [429, 503, ["Bonjour"]]
+    assert "".join(_client(serveur).flux("test", [])) == "Bonjour"
+
+
+@pytest.mark.parametrize("statut, erreur", [(429, GenerationLimitee), (500, GenerationEchouee), (401, GenerationEchouee)])
+def test_erreurs_typees(serveur, statut, erreur):
+    ServeurFactice.scenario = [statut]
+    with pytest.raises(erreur):
+        list(_client(serveur, tentatives=2).flux("test", []))
+
+
+def test_modele_trop_lent(serveur):
+    ServeurFactice.scenario = [["Il était ", 1.0, "une fois"]]
+    morceaux = []
+    with pytest.raises(GenerationLente):
+        for morceau in _client(serveur, delai_lecture=0.2).flux("test", []):
+            morceaux.append(morceau)
+    # Rien n'est recommencé une fois le premier morceau reçu
+    assert morceaux == ["Il était "]
+
+
+def test_reponse_tronquee(serveur):
+    ServeurFactice.scenario = [["Il était ", "une fois un petit chat qu", None]]
+    client = _client(serveur)
+    morceaux = []
+    with pytest.raises(GenerationTronquee):
+        for morceau in client.flux("test", []):
+            morceaux.append(morceau)
+    assert "".join(morceaux) == "Il était une fois un petit chat qu"
+    # La réponse a été lue jusqu'au bout : la connexion reste utilisable
+    ServeurFactice.scenario = [["Bonjour"]]
+    assert "".join(client.flux("test", [])) == "Bonjour"
+    assert len(ServeurFactice.connexions) == 1
+
+
+def test_annulation_coupe_la_lecture_en_cours(serveur):
+    ServeurFactice.scenario = [["Il était ", 5.0, "une fois"]]
+    annulation = Annulation()
+    morceaux = []
+    fin = threading.Event()
+
+    def lire():
+        for morceau in _client(serveur).flux("test", [], annulation=annulation):
+            morceaux.append(morceau)
+        fin.set()
+
+    threading.Thread(target=lire, daemon=True).start()
+    limite = time.monotonic() + 2
+    while not morceaux and time.monotonic() < limite:
+        time.sleep(0.01)
+    debut = time.monotonic()
+    annulation.set()
+    # La lecture s'arrête sans attendre le morceau suivant (5 s) ni d'erreur
+    assert fin.wait(1)
+    assert time.monotonic() - debut < 1
+    assert morceaux == ["Il était "]
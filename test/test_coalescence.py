@@ -0,0 +1,54 @@
+import threading
+import time
+
+from coalescence import Coalesceur
+
+
+def test_appels_identiques_regroupes():
+    coalesceur = Coalesceur("test")
+    depart = threading.Event()
+    appels = []
+
+    def travail(vol):
+        appels.append(vol.cle)
+        depart.wait()
+        for morceau in ("Il ", "était ", "une fois"):
+            vol.publier(morceau)
+        vol.terminer("fin")
+
+    vols = [coalesceur.rejoindre("cle", travail) for _ in range(25)]
+    autre = coalesceur.rejoindre("autre", travail)
+    assert coalesceur.abonnes() == {"cle": 25, "autre": 1}
+
+    resultats = []
+
+    def suivre(vol):
+        resultats.append(("".join(vol.suivre()), vol.resultat))
+
+    threads = [threading.Thread(target=suivre, args=(vol,)) for vol in vols + [autre]]
+    for thread in threads:
+        thread.start()
+    depart.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sorted(appels) == ["autre", "cle"]
+    assert resultats == [("Il était une fois", "fin")] * 26
+
+    # Une fois l'appel terminé, la clé est libérée
+    limite = time.monotonic() + 5
+    while coalesceur.abonnes() and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert coalesceur.abonnes() == {}
+
+
+def test_erreur_transmise_aux_abonnes():
+    coalesceur = Coalesceur("test")
+
+    def travail(vol):
+        vol.publier("début")
+        raise RuntimeError("panne")
+
+    vol = coalesceur.rejoindre("cle", travail)
+    assert list(vol.suivre()) == ["début"]
+    assert isinstance(vol.resultat, RuntimeError)
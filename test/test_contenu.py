@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+import contenu
+from base_donnees import connexion_ecriture
+from contenu import TexteResume, charger_texte, lister_textes
+
+
+@pytest.fixture
+def base_contenu(base_temporaire, monkeypatch):
+    """Base temporaire, avec un cache de contenu neuf."""
+    monkeypatch.setattr(contenu, "_suivi_version", contenu._SuiviVersion())
+    monkeypatch.setattr(contenu, "_version_cache", None)
+    contenu.vider_cache()
+    return base_temporaire
+
+
+def _ajouter_texte(titre, difficulte="1 - Très facile", niveau="CP"):
+    with connexion_ecriture() as conn:
+        return conn.execute(
+            "INSERT INTO textes (niveau, titre, texte, nb_mots, theme, difficulte, image_path) "
+            "VALUES (?, ?, 'Le chat dort.', 3, 'animaux', ?, 'images/chat.png')",
+            (niveau, titre, difficulte)
+        ).lastrowid
+
+
+def test_texte_charge_avec_ses_questions_dans_l_ordre(base_contenu):
+    texte_id = _ajouter_texte("Le chat")
+    with connexion_ecriture() as conn:
+        # Insérées dans le désordre : rendues par difficulté, puis dans l'ordre d'ajout
+        for question, ordre in (("Difficile ?", 3), ("Facile ?", 1), ("Moyenne ?", 2), ("Facile aussi ?", 1)):
+            conn.execute(
+                "INSERT INTO qcm (texte_id, question, option_a, option_b, option_c, reponse_correcte, "
+                "ordre_difficulte) VALUES (?, ?, 'a', 'b', 'c', 'a', ?)", (texte_id, question, ordre)
+            )
+        for question, ordre in (("Pourquoi ?", 2), ("Qui ?", 1)):
+            conn.execute(
+                "INSERT INTO questions_ouvertes (texte_id, question, proposition_reponse, ordre_difficulte) "
+                "VALUES (?, ?, 'Parce que.', ?)", (texte_id, question, ordre)
+            )
+
+    texte = charger_texte(texte_id)
+    assert (texte.titre, texte.texte, texte.nb_mots) == ("Le chat", "Le chat dort.", 3)
+    assert [q.question for q in texte.qcm] == ["Facile ?", "Facile aussi ?", "Moyenne ?", "Difficile ?"]
+    assert texte.qcm[0].options == ["a", "b", "c"]
+    assert [q.question for q in texte.questions_ouvertes] == ["Qui ?", "Pourquoi ?"]
+
+
+def test_texte_sans_question_ou_inconnu(base_contenu):
+    texte_id = _ajouter_texte("Sans question")
+    texte = charger_texte(texte_id)
+    assert texte.qcm == () and texte.questions_ouvertes == ()
+    assert charger_texte(texte_id + 1) is None
+
+
+def test_liste_des_titres_par_difficulte(base_contenu):
+    _ajouter_texte("Difficile", "3 - Moyen")
+    premier = _ajouter_texte("Facile", "1 - Très facile")
+    _ajouter_texte("Autre niveau", niveau="CE1")
+    textes = lister_textes("CP")
+    assert [t.titre for t in textes] == ["Facile", "Difficile"]
+    assert textes[0] == TexteResume(premier, "Facile", "animaux", "1 - Très facile", "images/chat.png")
+
+
+def test_cache_invalide_par_une_ecriture_du_contenu_seulement(base_contenu, monkeypatch):
+    texte_id = _ajouter_texte("Avant")
+    chargements = []
+    charger = contenu._lister_textes_base
+    monkeypatch.setattr(contenu, "_lister_textes_base", lambda niveau: chargements.append(niveau) or charger(niveau))
+
+    assert [t.titre for t in lister_textes("CP")] == ["Avant"]
+    assert [t.titre for t in lister_textes("CP")] == ["Avant"]
+    assert charger_texte(texte_id).titre == "Avant"
+    assert len(chargements) == 1
+
+    # Un autre processus enregistre un résultat : le cache reste valide
+    externe = sqlite3.connect(base_contenu, isolation_level=None)
+    externe.execute("INSERT INTO resultats (texte_id, date_lecture, mots_lus) VALUES (?, '2024-01-01', 3)",
+                    (texte_id,))
+    assert [t.titre for t in lister_textes("CP")] == ["Avant"]
+    assert len(chargements) == 1
+
+    # Il modifie le contenu : la version change, le cache est vidé
+    externe.execute("UPDATE textes SET titre = 'Après' WHERE id = ?", (texte_id,))
+    externe.close()
+    assert [t.titre for t in lister_textes("CP")] == ["Après"]
+    assert charger_texte(texte_id).titre == "Après"
+    assert len(chargements) == 2
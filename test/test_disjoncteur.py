@@ -0,0 +1,52 @@
+import threading
+import time
+
+from disjoncteur import FERME, OUVERT, SEMI_OUVERT, Disjoncteur
+
+
+def test_ouverture_sur_echecs_consecutifs_puis_essai():
+    disjoncteur = Disjoncteur("test", echecs_consecutifs=3, duree_ouverture=0.05)
+    for _ in range(3):
+        assert disjoncteur.autorise()
+        disjoncteur.echec()
+    assert disjoncteur.etat == OUVERT
+    assert not disjoncteur.autorise()
+
+    time.sleep(0.06)
+    assert disjoncteur.etat == SEMI_OUVERT
+    # Un seul appel d'essai à la fois
+    assert disjoncteur.autorise()
+    assert not disjoncteur.autorise()
+    disjoncteur.succes()
+    assert disjoncteur.etat == FERME
+
+
+def test_ouverture_sur_taux_d_echec_et_latence():
+    disjoncteur = Disjoncteur("test", echecs_consecutifs=100, taux_echec=0.5, fenetre=10, appels_min=6,
+                              latence_max=1.0)
+    for _ in range(3):
+        disjoncteur.succes(duree=0.2)
+        disjoncteur.succes(duree=5.0)  # trop lent : compte comme un échec
+    assert disjoncteur.etat == OUVERT
+
+
+def test_sonde_en_arriere_plan():
+    disjoncteur = Disjoncteur("test", echecs_consecutifs=1, duree_ouverture=0.01)
+    disjoncteur.echec()
+    assert not disjoncteur.sonder(lambda: True)  # encore ouvert
+
+    time.sleep(0.02)
+    fin = threading.Event()
+
+    def essai():
+        fin.wait(1)
+        return True
+
+    assert disjoncteur.sonder(essai)
+    assert not disjoncteur.sonder(essai)  # une seule sonde à la fois
+    assert not disjoncteur.autorise()
+    fin.set()
+    limite = time.monotonic() + 1
+    while disjoncteur.etat != FERME and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert disjoncteur.etat == FERME
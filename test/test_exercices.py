@@ -0,0 +1,80 @@
+import json
+
+from exercices import ExtracteurTexte, questions_depuis_json, questions_vers_json, valider_qcm
+from client_ia import GenerationEchouee, GenerationTronquee
+from generation import MESSAGE_ERREUR, executer_generation
+
+QCM = [
+    {"question": "Qui dort ?", "options": ["Le chat", "Le chien", "Le lapin"],
+     "reponse_correcte": "Le chat", "ordre_difficulte": 1},
+    {"question": "Où ?", "options": ["Au lit", "Au jardin", "À l'école"],
+     "reponse_correcte": "Au lit", "ordre_difficulte": 2},
+    {"question": "Pourquoi ?", "options": ["Il est fatigué", "Il a faim", "Il joue"],
+     "reponse_correcte": "Il est fatigué", "ordre_difficulte": 3},
+]
+QUESTIONS_OUVERTES = [
+    {"question": "Comment s'appelle le chat ?", "proposition_reponse": "Minou", "ordre_difficulte": 1},
+    {"question": "Aimes-tu dormir ?", "proposition_reponse": "Oui, le soir.", "ordre_difficulte": 2},
+]
+
+
+def _decouper(texte, taille):
+    return (texte[i:i + taille] for i in range(0, len(texte), taille))
+
+
+def test_texte_extrait_quelle_que_soit_la_decoupe():
+    texte = "Le chat « Minou » dort.\nIl rêve 🌙 d'un \"poisson\"."
+    for ascii_seulement in (False, True):
+        reponse = json.dumps({"texte": texte, "qcm": QCM}, ensure_ascii=ascii_seulement)
+        for taille in (1, 2, 3, 7):
+            extracteur = ExtracteurTexte()
+            assert "".join(extracteur.filtrer(_decouper(reponse, taille))) == texte
+            assert len(extracteur.questions()["qcm"]) == 3
+
+
+def test_reponse_en_texte_brut_acceptee():
+    extracteur = ExtracteurTexte()
+    assert "".join(extracteur.filtrer(_decouper("Il était une fois un chat.", 4))) == "Il était une fois un chat."
+    assert not extracteur.json
+    assert extracteur.questions() == {}
+
+
+def test_qcm_invalides_ecartes():
+    lignes = QCM + [
+        {"question": "Sans bonne réponse ?", "options": ["a", "b", "c"], "reponse_correcte": "d"},
+        {"question": "Deux options ?", "options": ["a", "b"], "reponse_correcte": "a"},
+        "pas un objet",
+    ]
+    assert [q.question for q in valider_qcm(lignes)] == ["Qui dort ?", "Où ?", "Pourquoi ?"]
+    qcm, questions = questions_depuis_json(questions_vers_json(valider_qcm(QCM), ()))
+    assert qcm == valider_qcm(QCM) and questions == ()
+
+
+def test_seules_les_questions_manquantes_sont_redemandees():
+    reponse = json.dumps({"texte": "Le chat dort.", "qcm": QCM, "questions_ouvertes": []})
+    demandes = []
+
+    def completer(texte, parties):
+        demandes.append((texte, parties))
+        return {"questions_ouvertes": QUESTIONS_OUVERTES}
+
+    resultat = executer_generation(_decouper(reponse, 5), "Histoire", completer=completer)
+    assert resultat.texte == "Le chat dort."
+    assert demandes == [("Le chat dort.", ["questions_ouvertes"])]
+    assert len(resultat.qcm) == 3 and len(resultat.questions_ouvertes) == 2
+
+
+def test_reponse_sans_texte_en_echec():
+    reponse = json.dumps({"text": "Le chat dort.", "qcm": QCM})
+    resultat = executer_generation(_decouper(reponse, 5), "Histoire")
+    assert isinstance(resultat.erreur, GenerationEchouee)
+    assert resultat.texte == MESSAGE_ERREUR and not resultat.moderee
+
+
+def test_reponse_coupee_dans_le_texte_en_echec():
+    reponse = json.dumps({"texte": "Il était une fois un petit chat qui dormait.", "qcm": QCM})
+    coupee = reponse[:reponse.index("qui")]
+    assert "".join(ExtracteurTexte().filtrer(_decouper(coupee, 5))) == "Il était une fois un petit chat "
+    resultat = executer_generation(_decouper(coupee, 5), "Histoire")
+    assert isinstance(resultat.erreur, GenerationTronquee)
+    assert resultat.texte == MESSAGE_ERREUR
@@ -0,0 +1,100 @@
+import json
+import threading
+
+import pytest
+
+import generation
+from base_donnees import connexion_lecture
+from client_ia import GenerationTronquee
+from generation import GenerationFlux, generer_texte
+from metriques import METRIQUES
+from routeur import FluxRoute
+
+TEXTE = "Il était une fois un petit chat tout gris. Il dormait au soleil près de la fenêtre."
+
+
+@pytest.fixture
+def modele(base_temporaire, monkeypatch):
+    """Remplace l'appel au modèle : la réponse s'arrête après son premier morceau
+    jusqu'à ce que le test lève reprise."""
+    appels = []
+    reprise = threading.Event()
+
+    def flux_modele(self):
+        appels.append(self.messages)
+        reponse = json.dumps({"texte": TEXTE})
+        yield reponse[:60]
+        reprise.wait(5)
+        yield reponse[60:]
+
+    monkeypatch.setattr(GenerationFlux, "_flux_modele", flux_modele)
+    monkeypatch.setattr(generation, "_completer_questions", lambda api_key, age_range: None)
+    return appels, reprise
+
+
+def test_texte_affiche_au_fil_de_l_eau(modele):
+    appels, reprise = modele
+    mesures = METRIQUES.taille("generation.premier_morceau")
+    flux = generer_texte("cle-test", "6–7 ans", "Histoire", "un chat au soleil")
+    morceaux = iter(flux)
+
+    # Le début du texte est affiché pendant que le modèle écrit encore
+    premier = next(morceaux)
+    assert TEXTE.startswith(premier) and premier != TEXTE
+    assert flux.premier_morceau is not None and flux.duree is None
+    assert METRIQUES.taille("generation.premier_morceau") == mesures + 1
+
+    reprise.set()
+    assert premier + "".join(morceaux) == TEXTE
+    assert flux.texte == TEXTE and flux.erreur is None and not flux.depuis_cache
+    assert flux.nb_mots == 17
+    assert flux.duree >= flux.premier_morceau
+
+    # La même demande est ensuite servie depuis le cache, d'un seul morceau
+    encore = generer_texte("cle-test", "6–7 ans", "Histoire", "Un chat au soleil !")
+    assert list(encore) == [TEXTE] and encore.depuis_cache
+    assert len(appels) == 1
+
+
+def test_reponse_tronquee_jamais_mise_en_cache(modele, monkeypatch):
+    appels, _ = modele
+
+    def flux_tronque(self):
+        appels.append(self.messages)
+        yield json.dumps({"texte": TEXTE})[:60]
+        raise GenerationTronquee("Réponse coupée par la limite de jetons")
+
+    monkeypatch.setattr(GenerationFlux, "_flux_modele", flux_tronque)
+    for _ in range(2):
+        flux = generer_texte("cle-test", "6–7 ans", "Histoire", "un chat qui dort")
+        list(flux)
+        assert isinstance(flux.erreur, GenerationTronquee)
+        assert flux.texte == generation.MESSAGE_ERREUR and not flux.depuis_cache
+    assert len(appels) == 2
+
+
+def test_modele_qui_a_repondu_enregistre(modele, monkeypatch):
+    def flux_couverture(self):
+        # Le second modèle de la liste a remporté la requête doublée
+        route = FluxRoute()
+        route.modele = "modele/secours"
+        route._morceaux = (morceau for morceau in [json.dumps({"texte": TEXTE})])
+        return route
+
+    monkeypatch.setattr(GenerationFlux, "_flux_modele", flux_couverture)
+    flux = generer_texte("cle-test", "6–7 ans", "Histoire", "un chat en couverture")
+    list(flux)
+    with connexion_lecture() as conn:
+        modeles = conn.execute("SELECT modele FROM generations WHERE cle = ?", (flux.cle,)).fetchall()
+    assert modeles == [("modele/secours",)]
+
+
+def test_surprise_jamais_servie_depuis_le_cache(modele):
+    appels, reprise = modele
+    reprise.set()
+    for _ in range(2):
+        # Saisie vide, réserve vide (non démarrée) : une nouvelle génération à chaque fois
+        flux = generer_texte("cle-test", "6–7 ans", "Histoire", "")
+        assert "".join(flux) == TEXTE
+        assert flux.generique and not flux.depuis_cache and not flux.depuis_reserve
+    assert len(appels) == 2
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+import illustrations
+from illustrations import ecrire_atomique, image_octets, theme_image
+
+
+def test_theme_depuis_le_fichier_puis_le_titre():
+    assert theme_image("images/ce2_orage.png", "Le chat") == "orage"
+    assert theme_image("images/image.png", "Une nuit étoilée") == "nuit"
+    assert theme_image("images/image.png", "Filou fait des bêtises") == "chien"
+    assert theme_image("images/image.png", "La rentrée") == "ecole"
+    assert theme_image("images/image.png", "Un titre sans thème") == "default"
+
+
+def test_ecriture_atomique(tmp_path):
+    chemin = tmp_path / "images" / "a.png"
+    ecrire_atomique(str(chemin), b"un")
+    ecrire_atomique(str(chemin), b"deux")
+    assert chemin.read_bytes() == b"deux"
+    assert os.listdir(chemin.parent) == ["a.png"]
+
+
+def test_image_lue_une_fois_par_version_du_fichier(tmp_path, monkeypatch):
+    monkeypatch.setattr(illustrations, "_images", illustrations.CacheLRU(8))
+    chemin = tmp_path / "chat.png"
+    chemin.write_bytes(b"AAAA")
+    assert image_octets(str(chemin), "Le chat") == b"AAAA"
+    assert image_octets(str(chemin), "Le chat") == b"AAAA"
+    assert illustrations._images.succes == 1
+
+    chemin.write_bytes(b"BBBB")
+    os.utime(chemin, ns=(0, 0))
+    assert image_octets(str(chemin), "Le chat") == b"BBBB"
+
+
+def test_illustration_manquante_dessinee(tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    monkeypatch.setattr(illustrations, "_images", illustrations.CacheLRU(8))
+    chemin = tmp_path / "images" / "ce1_piscine.png"
+    octets = image_octets(str(chemin), "À la piscine")
+    assert octets.startswith(b"\x89PNG") and chemin.read_bytes() == octets
@@ -0,0 +1,65 @@
+import json
+import sqlite3
+
+import pytest
+
+import ingestion
+
+
+def _enregistrement(titre, **champs):
+    enregistrement = {
+        "niveau": "CP",
+        "titre": titre,
+        "texte": "J'ai un chat. Il est gris.",
+        "qcm": [{"question": "De quelle couleur ?", "options": ["Noir", "Gris", "Blanc"],
+                 "reponse_correcte": "Gris", "ordre_difficulte": 1}],
+        "questions_ouvertes": [{"question": "Qui ?", "proposition_reponse": "Un chat.", "ordre_difficulte": 1}],
+    }
+    enregistrement.update(champs)
+    return enregistrement
+
+
+def test_ingestion_par_lots_et_rejets(base_temporaire, tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    with open(corpus, "w", encoding="utf-8") as f:
+        for i in range(5):
+            f.write(json.dumps(_enregistrement(f"Texte {i}")) + "\n")
+        f.write(json.dumps(_enregistrement("Mauvais niveau", niveau="CM2")) + "\n")
+        f.write("{pas du json\n")
+
+    rapport = ingestion.ingerer([str(corpus)], taille_lot=2)
+
+    assert (rapport.textes, rapport.qcm, rapport.questions_ouvertes, rapport.rejets) == (5, 5, 5, 2)
+    conn = sqlite3.connect(base_temporaire)
+    # Chaque QCM est rattaché au texte inséré dans le même lot
+    assert conn.execute("""
+        SELECT COUNT(*) FROM qcm JOIN textes ON textes.id = qcm.texte_id
+    """).fetchone()[0] == 5
+
+
+def test_reponse_hors_options_rejetee():
+    enregistrement = _enregistrement("Texte")
+    enregistrement["qcm"][0]["reponse_correcte"] = "Vert"
+    with pytest.raises(ingestion.ErreurCorpus):
+        ingestion.valider_enregistrement(enregistrement)
+
+
+def test_synchronisation_incrementale(base_temporaire, tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+
+    def ecrire(enregistrements):
+        with open(corpus, "w", encoding="utf-8") as f:
+            for enregistrement in enregistrements:
+                f.write(json.dumps(enregistrement) + "\n")
+
+    ecrire([_enregistrement("Un"), _enregistrement("Deux"), _enregistrement("Trois")])
+    ingestion.ingerer([str(corpus)], synchroniser=True)
+    conn = sqlite3.connect(base_temporaire)
+    ids = dict(conn.execute("SELECT titre, id FROM textes"))
+
+    ecrire([_enregistrement("Un"), _enregistrement("Deux", texte="Texte corrigé.")])
+    rapport = ingestion.ingerer([str(corpus)], synchroniser=True)
+
+    assert (rapport.ajoutes, rapport.modifies, rapport.inchanges, rapport.supprimes) == (0, 1, 1, 1)
+    assert dict(conn.execute("SELECT titre, id FROM textes")) == {"Un": ids["Un"], "Deux": ids["Deux"]}
+    assert conn.execute("SELECT texte FROM textes WHERE titre = 'Deux'").fetchone()[0] == "Texte corrigé."
@@ -0,0 +1,27 @@
+from generation import LONGUEUR_PAR_AGE, MESSAGE_TROP_LONG, construire_messages, generer_texte, max_jetons
+from jetons import JETONS_QUESTIONS, compacter, estimer_jetons, jetons_texte
+
+
+def test_max_tokens_suit_la_longueur_cible():
+    budgets = [max_jetons(age) for age in LONGUEUR_PAR_AGE]
+    assert budgets == sorted(budgets) and len(set(budgets)) == len(budgets)
+    # 250 mots au plus pour les 8–9 ans, avec la marge, plus les questions
+    assert max_jetons("8–9 ans") == jetons_texte("200 à 250 mots") + JETONS_QUESTIONS
+    assert max_jetons("âge inconnu") > JETONS_QUESTIONS
+
+
+def test_modification_envoie_le_texte_entier():
+    assert compacter("Un   texte\n\n\n\ncourt.") == "Un texte\n\ncourt."
+    texte = "Le petit chat dort au soleil près de la fenêtre. " * 40 + "Et il rêve de poissons."
+    messages = construire_messages("6–7 ans", "Histoire", "ajoute un chien", texte)
+    assert "Et il rêve de poissons." in messages[1]["content"]
+    # La réponse a la place de réécrire tout le texte, au-delà de la longueur cible
+    assert max_jetons("6–7 ans", texte) > estimer_jetons(texte) + JETONS_QUESTIONS
+    assert max_jetons("6–7 ans", texte) > max_jetons("6–7 ans")
+    assert max_jetons("8–9 ans", "Le chat dort.") == max_jetons("8–9 ans")
+
+
+def test_texte_trop_long_refuse_sans_appel():
+    generation = generer_texte("cle-test", "6–7 ans", "Histoire", "ajoute un chien", "Le chat dort. " * 1000)
+    assert list(generation) == []
+    assert generation.texte == MESSAGE_TROP_LONG and generation.erreur is not None
@@ -0,0 +1,37 @@
+import sqlite3
+
+import migrations
+
+
+def test_migration_base_vide(base_vide):
+    assert migrations.migrer() == list(range(1, migrations.VERSION_SCHEMA + 1))
+    assert migrations.migrer() == []
+
+    conn = sqlite3.connect(base_vide)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == migrations.VERSION_SCHEMA
+    index = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_qcm_texte", "idx_questions_ouvertes_texte",
+            "idx_textes_niveau", "idx_resultats_texte"} <= index
+
+
+def test_migration_conserve_resultats(base_vide):
+    # Base créée avant les migrations (user_version = 0) avec un historique
+    conn = sqlite3.connect(base_vide)
+    conn.execute("""
+        CREATE TABLE resultats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            texte_id INTEGER NOT NULL,
+            date_lecture TEXT NOT NULL,
+            temps_secondes REAL,
+            mots_lus INTEGER,
+            mots_par_minute REAL
+        )
+    """)
+    conn.execute("INSERT INTO resultats (texte_id, date_lecture) VALUES (1, '2024-01-01')")
+    conn.commit()
+    conn.close()
+
+    migrations.migrer()
+
+    conn = sqlite3.connect(base_vide)
+    assert conn.execute("SELECT COUNT(*) FROM resultats").fetchone()[0] == 1
@@ -0,0 +1,123 @@
+import json
+import os
+
+from generation import executer_generation
+from moderation import CONTEXTE_FLUX, AnalyseFlux, Detecteur, GestionnaireLexique, contient_mot_interdit
+
+
+def test_accents_et_lettres_espacees():
+    assert contient_mot_interdit("de la cocaïne")
+    assert contient_mot_interdit("HÉROÏNE")
+    assert contient_mot_interdit("m.e.r.d.e !")
+    assert contient_mot_interdit("c o n")
+
+
+def test_mots_entiers_seulement():
+    assert not contient_mot_interdit("Il était une fois un conte")
+    assert not contient_mot_interdit("Il marche pieds nus dans le sable.")
+    assert not contient_mot_interdit("il y a un arc-en-ciel")
+
+
+def test_mots_composes_et_expressions_courantes():
+    assert not contient_mot_interdit("Après le pique-nique, il garde son sang-froid.")
+    assert not contient_mot_interdit("Toc, toc ! Quelqu'un vient frapper à la porte.")
+    assert not contient_mot_interdit("L'oiseau se met à battre des ailes.")
+    # Les élisions séparent toujours deux mots
+    assert contient_mot_interdit("Il a pris l'arme.")
+    assert contient_mot_interdit("Il veut frapper son frère.")
+    assert contient_mot_interdit("c-o-n")
+
+
+def test_prefixes_communs():
+    detecteur = Detecteur(["chat", "chaton", "chien"])
+    assert detecteur.chercher("un petit chaton") == "chaton"
+    assert detecteur.chercher("un chat") == "chat"
+    assert detecteur.chercher("une chatte") is None
+
+
+def _analyser(morceaux, detecteur):
+    analyse = AnalyseFlux(detecteur)
+    valide = "".join(analyse.ajouter(morceau) for morceau in morceaux) + analyse.terminer()
+    return analyse, valide
+
+
+def test_flux_mot_interdit_coupe_entre_deux_morceaux():
+    analyse, valide = _analyser(["Il dit : gros co", "n ! Puis il part."], Detecteur(["con"]))
+    assert analyse.mot_trouve == "con"
+    assert "co" not in valide
+
+
+def test_flux_mot_anodin_a_la_limite_du_contexte():
+    detecteur = Detecteur(["con", "nu", "arme"])
+    texte = ("Le petit garçon apprend sa leçon. Il regarde le menu et verse une larme "
+             "sur le balcon. Puis il rentre chez lui.")
+    for taille in (1, 3, 7):
+        morceaux = [texte[i:i + taille] for i in range(0, len(texte), taille)]
+        analyse, valide = _analyser(morceaux, detecteur)
+        assert analyse.mot_trouve is None and valide == texte
+    # « garçon » à cheval sur le début de la fenêtre de contexte : seul « çon » y entre
+    premier = "garçon" + " a" * ((CONTEXTE_FLUX - 3) // 2) + " "
+    assert premier[-CONTEXTE_FLUX:].startswith("çon")
+    analyse, _ = _analyser([premier, "fin."], detecteur)
+    assert analyse.mot_trouve is None
+
+
+def test_flux_lettres_espacees_sur_plusieurs_morceaux():
+    analyse, _ = _analyser(["Il dit c ", "o ", "n !"], Detecteur(["con"]))
+    assert analyse.mot_trouve == "con"
+
+
+def test_generation_garde_les_mots_composes():
+    texte = ("Le jour du pique-nique, Léo entend frapper à la porte. C'est Lou, qui "
+             "garde son sang-froid : un oiseau vient de battre des ailes aujourd'hui.")
+    for taille in (1, 4, 9):
+        reponse = json.dumps({"texte": texte})
+        morceaux = (reponse[i:i + taille] for i in range(0, len(reponse), taille))
+        resultat = executer_generation(morceaux, "Histoire")
+        assert not resultat.moderee and resultat.erreur is None
+        assert resultat.texte == texte
+
+    reponse = json.dumps({"texte": "Il veut frapper son frère à la porte."})
+    assert executer_generation((morceau for morceau in [reponse]), "Histoire").moderee
+
+
+def test_flux_expression_autorisee_coupee_entre_morceaux():
+    detecteur = Detecteur(["frapper"], ["frapper à la porte"])
+    analyse, valide = _analyser(["On entend frap", "per à la ", "porte. Fin."], detecteur)
+    assert analyse.mot_trouve is None and valide == "On entend frapper à la porte. Fin."
+    analyse, valide = _analyser(["On entend frap", "per à la ", "fenêtre."], detecteur)
+    assert analyse.mot_trouve == "frapper" and valide == "On entend "
+
+
+def _ecrire_lexique(chemin, contenu, date):
+    chemin.write_text(contenu if isinstance(contenu, str) else json.dumps(contenu), encoding="utf-8")
+    os.utime(chemin, ns=(date, date))
+
+
+def _lexique(version, mots):
+    section = {"mots_interdits": {"test": mots}, "textes_secours": {}, "textes_repli": {}}
+    return {"version": version, "locales": {"fr": section}}
+
+
+def _verifier(gestionnaire):
+    """Déclenche une vérification du fichier et attend la fin du rechargement."""
+    gestionnaire.courant()
+    gestionnaire._rechargement.join()
+    return gestionnaire.courant()
+
+
+def test_lexique_recharge_a_chaud(tmp_path):
+    chemin = tmp_path / "lexique.json"
+    _ecrire_lexique(chemin, _lexique(1, ["loup"]), 1_000_000_000)
+    gestionnaire = GestionnaireLexique(str(chemin), intervalle=0)
+    assert gestionnaire.courant().detecteur.contient("un loup")
+
+    # Fichier modifié : pris en compte à la vérification suivante
+    _ecrire_lexique(chemin, _lexique(2, ["ogre"]), 2_000_000_000)
+    lexique = _verifier(gestionnaire)
+    assert lexique.version == 2
+    assert lexique.detecteur.contient("un ogre") and not lexique.detecteur.contient("un loup")
+
+    # Fichier invalide : l'ancien lexique reste en service
+    _ecrire_lexique(chemin, '{"version": 3, "locales": ', 3_000_000_000)
+    assert _verifier(gestionnaire) is lexique
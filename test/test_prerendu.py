@@ -0,0 +1,23 @@
+import pytest
+
+from prerendu import prerendre
+
+
+def test_images_presentes_ignorees(tmp_path):
+    image = tmp_path / "chat.png"
+    image.write_bytes(b"png")
+    rapport = prerendre([(str(image), "Le chat")], processus=2)
+    assert (rapport.presentes, rapport.dessinees, rapport.echecs) == (1, 0, 0)
+    assert image.read_bytes() == b"png"
+
+
+def test_prerendu_parallele_idempotent(tmp_path):
+    pytest.importorskip("PIL")
+    taches = [(str(tmp_path / "images" / f"texte_{i}.png"), titre)
+              for i, titre in enumerate(["Le chat", "La pluie", "Au zoo", "Sans thème"] * 3)]
+    rapport = prerendre(taches, processus=2)
+    assert (rapport.dessinees, rapport.echecs) == (12, 0)
+    assert all((tmp_path / "images" / f"texte_{i}.png").read_bytes().startswith(b"\x89PNG") for i in range(12))
+
+    rapport = prerendre(taches, processus=2)
+    assert (rapport.presentes, rapport.dessinees) == (12, 0)
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+import reserve
+from client_ia import GenerationLimitee
+from generation import ResultatGeneration
+from reserve import ReserveTextes
+
+
+def _attendre(condition, delai=5):
+    limite = time.monotonic() + delai
+    while not condition() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def appels():
+    return []
+
+
+def test_remplissage_entre_les_seuils(appels):
+    def produire(age, mode):
+        appels.append((age, mode))
+        return ResultatGeneration(f"Texte {len(appels)}.", 2, False, None)
+
+    textes = ReserveTextes(bas=2, haut=4, intervalle=0)
+    textes.demarrer(produire, [("6–7 ans", "Histoire")])
+    try:
+        assert _attendre(lambda: textes.niveaux() == {("6–7 ans", "Histoire"): 4})
+        assert textes.prendre("6–7 ans", "Histoire").texte == "Texte 1."
+        assert textes.prendre("7–8 ans", "Histoire") is None
+
+        # Au-dessus du seuil bas : pas de nouvelle génération
+        time.sleep(0.05)
+        assert len(appels) == 4
+
+        # Sous le seuil bas : la réserve remonte jusqu'au seuil haut
+        textes.prendre("6–7 ans", "Histoire")
+        textes.prendre("6–7 ans", "Histoire")
+        assert _attendre(lambda: textes.niveaux()[("6–7 ans", "Histoire")] == 4)
+        assert len(appels) == 7
+    finally:
+        textes.arreter()
+
+
+def test_pause_sur_limite_de_debit(appels, monkeypatch):
+    monkeypatch.setattr(reserve, "PAUSE_LIMITE", 60)
+
+    def produire(age, mode):
+        appels.append((age, mode))
+        return ResultatGeneration("", 0, False, GenerationLimitee("429"))
+
+    textes = ReserveTextes(intervalle=0)
+    textes.demarrer(produire, [("6–7 ans", "Histoire")])
+    try:
+        assert _attendre(lambda: appels)
+        textes.prendre("6–7 ans", "Histoire")
+        time.sleep(0.1)
+        assert len(appels) == 1
+    finally:
+        textes.arreter()
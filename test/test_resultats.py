@@ -0,0 +1,38 @@
+import sqlite3
+
+import resultats
+from resultats import FileResultats
+
+
+def _lignes(chemin):
+    conn = sqlite3.connect(chemin)
+    try:
+        return conn.execute("SELECT cle_idempotence, mots_lus FROM resultats ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_resultats_ecrits_par_lots_et_vides_a_l_arret(base_temporaire, monkeypatch):
+    lots = []
+    ecrire = resultats._ecrire
+    monkeypatch.setattr(resultats, "_ecrire", lambda lignes: lots.append(len(lignes)) or ecrire(lignes))
+    # Délai long : sans l'arrêt, le dernier lot incomplet attendrait encore
+    file = FileResultats(taille_lot=4, delai_lot=30)
+    for i in range(10):
+        file.enregistrer(f"lecture-{i}", 1, 60.0, 40 + i, 40.0)
+    file.arreter()
+
+    assert sum(lots) == 10 and max(lots) <= 4 and len(lots) >= 3
+    assert [mots for _, mots in _lignes(base_temporaire)] == list(range(40, 50))
+
+
+def test_meme_cle_ecrite_une_seule_fois(base_temporaire):
+    file = FileResultats(delai_lot=0.01)
+    file.enregistrer("lecture-1", 1, 60.0, 40, 40.0)
+    file.vider()
+    # Reruns Streamlit : le même résultat est redéposé, dans un autre lot
+    file.enregistrer("lecture-1", 1, 60.0, 40, 40.0)
+    file.enregistrer("lecture-1", 1, 60.0, 40, 40.0)
+    file.arreter()
+
+    assert _lignes(base_temporaire) == [("lecture-1", 40)]
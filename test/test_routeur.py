@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+import routeur
+from client_ia import GenerationEchouee
+from metriques import METRIQUES
+from routeur import RouteurModeles
+
+
+class ClientFactice:
+    """Client dont chaque modèle répond selon un scénario : délai avant le premier morceau, ou erreur."""
+
+    def __init__(self, **scenarios):
+        self.scenarios = scenarios
+        self.appels = []
+        self.annulations = {}
+
+    def flux(self, modele, messages, annulation=None, **options):
+        self.appels.append(modele)
+        self.annulations[modele] = annulation
+        scenario = self.scenarios[modele]
+        if isinstance(scenario, Exception):
+            raise scenario
+        time.sleep(scenario)
+        yield f"{modele} : "
+        yield "il était une fois"
+
+
+@pytest.fixture(autouse=True)
+def delai_court(monkeypatch):
+    monkeypatch.setattr(routeur, "DELAI_COUVERTURE_DEFAUT", 0.1)
+
+
+def test_modele_principal_rapide():
+    client = ClientFactice(a=0, b=0)
+    flux = RouteurModeles(["a", "b"]).flux(client, [])
+    assert "".join(flux) == "a : il était une fois" and flux.modele == "a"
+    assert client.appels == ["a"]
+
+
+def test_requete_doublee_si_le_principal_tarde():
+    couvertures = METRIQUES.compteur("routeur.couverture_gagnante")
+    client = ClientFactice(a=1.0, b=0)
+    flux = RouteurModeles(["a", "b"]).flux(client, [])
+    assert "".join(flux) == "b : il était une fois" and flux.modele == "b"
+    assert client.appels == ["a", "b"]
+    assert METRIQUES.compteur("routeur.couverture_gagnante") == couvertures + 1
+    # Le perdant, qui n'a encore rien envoyé, est annulé dès que b l'emporte
+    assert client.annulations["a"].is_set() and not client.annulations["b"].is_set()
+
+
+def test_repli_puis_disjoncteur():
+    client = ClientFactice(a=GenerationEchouee("panne"), b=0)
+    modeles = RouteurModeles(["a", "b"])
+    for _ in range(3):
+        assert "".join(modeles.flux(client, [])) == "b : il était une fois"
+    assert client.appels == ["a", "b"] * 3
+
+    # Trois échecs d'affilée : le modèle a n'est plus sollicité
+    client.appels.clear()
+    assert "".join(modeles.flux(client, [])) == "b : il était une fois"
+    assert client.appels == ["b"]
+
+
+def test_tous_les_modeles_en_echec():
+    client = ClientFactice(a=GenerationEchouee("panne a"), b=GenerationEchouee("panne b"))
+    with pytest.raises(GenerationEchouee, match="panne b"):
+        list(RouteurModeles(["a", "b"]).flux(client, []))
@@ -0,0 +1,16 @@
+from tokenisation import CompteurMots, compter_mots, decouper_mots
+
+
+def test_elisions_et_mots_composes():
+    assert decouper_mots("J'ai vu l’arc-en-ciel aujourd'hui !") == ["J'", "ai", "vu", "l’", "arc-en-ciel", "aujourd'hui"]
+
+
+def test_ponctuation_isolee_non_comptee():
+    assert compter_mots("Splash ! C'est rigolo … — Oui ?") == 5
+
+
+def test_compteur_incremental_mot_coupe():
+    compteur = CompteurMots()
+    for fragment in ["Le cha", "t dort. Il s'", "appelle Mi", "nou."]:
+        compteur.ajouter(fragment)
+    assert compteur.total == compter_mots("Le chat dort. Il s'appelle Minou.") == 7
@@ -0,0 +1,68 @@
+import os
+from io import BytesIO
+
+import pytest
+
+import illustrations
+import ressources
+import vignettes
+from vignettes import vignette
+
+
+@pytest.fixture(autouse=True)
+def caches_vides(monkeypatch):
+    monkeypatch.setattr(illustrations, "_images", illustrations.CacheLRU(8))
+    monkeypatch.setattr(vignettes, "_vignettes", vignettes.CacheLRU(8))
+
+
+def test_reductions_calculees_une_fois_par_version_du_fichier(tmp_path, monkeypatch):
+    cotes = []
+    monkeypatch.setattr(vignettes, "reduire", lambda octets, cote: cotes.append(cote) or octets + b"%d" % cote)
+    chemin = tmp_path / "chat.png"
+    chemin.write_bytes(b"AAAA")
+
+    icone = vignette(str(chemin), "Le chat")
+    assert vignette(str(chemin), "Le chat") is icone
+    assert cotes == [50, 100]
+    assert icone.srcset.endswith(" 2x") and icone.src in icone.srcset
+
+    # Illustration remplacée : la vignette est recalculée depuis le nouveau contenu
+    chemin.write_bytes(b"BBBB")
+    os.utime(chemin, ns=(0, 0))
+    nouvelle = vignette(str(chemin), "Le chat")
+    assert cotes == [50, 100, 50, 100]
+    assert nouvelle.src != icone.src and nouvelle.src == vignettes._uri(b"BBBB50")
+
+
+def test_image_entiere_si_la_reduction_echoue(tmp_path, monkeypatch):
+    def echec(octets, cote):
+        raise OSError("image illisible")
+    monkeypatch.setattr(vignettes, "reduire", echec)
+    chemin = tmp_path / "chat.png"
+    chemin.write_bytes(b"png")
+    assert vignette(str(chemin), "Le chat").src == "data:image/png;base64,cG5n"
+
+
+def test_reduction_au_carre():
+    Image = pytest.importorskip("PIL.Image")
+    sortie = BytesIO()
+    Image.new("RGB", (400, 300), "#FFB366").save(sortie, format="PNG")
+    with Image.open(BytesIO(vignettes.reduire(sortie.getvalue(), 100))) as reduite:
+        assert reduite.size == (100, 100)
+
+
+def test_vignettes_publiees_sous_un_nom_d_empreinte(tmp_path, monkeypatch):
+    monkeypatch.setattr(vignettes, "reduire", lambda octets, cote: b"%d" % cote)
+    monkeypatch.setattr(ressources, "DOSSIER_STATIQUE", str(tmp_path / "static"))
+    chemin = tmp_path / "ce1_chat.png"
+    chemin.write_bytes(b"png")
+
+    icone = vignette(str(chemin), "Le chat", statique=True)
+    cle = ressources.empreinte(b"50")
+    assert icone.src == f"app/static/ce1_chat-50-{cle}.png?v={cle}"
+    assert (tmp_path / "static" / f"ce1_chat-50-{cle}.png").read_bytes() == b"50"
+    # Même contenu, même adresse : rien n'est réécrit
+    assert ressources.publier(b"50", "ce1_chat-50", "png") == icone.src
+    assert sorted(os.listdir(tmp_path / "static")) == sorted(
+        f"ce1_chat-{cote}-{ressources.empreinte(b'%d' % cote)}.png" for cote in (50, 100)
+    )
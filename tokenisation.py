@@ -0,0 +1,59 @@
+import re
+
+# Un mot : lettres ou chiffres, avec traits d'union et apostrophes internes
+# (« arc-en-ciel », « grand-mère », « aujourd'hui », « J'ai »). La ponctuation
+# isolée (« ! », « ? », « … », tirets de dialogue) n'est pas un mot.
+_MOT = re.compile(r"[^\W_]+(?:[-'’][^\W_]+)*")
+
+# Apostrophes d'élision : « J'ai » se lit et se compte comme deux mots
+_ELISION = re.compile(r"(?i)\b(?:jusqu|lorsqu|puisqu|quoiqu|qu|[cdjlmnst])['’]")
+
+
+def decouper_mots(texte):
+    """Découpe un texte français en mots.
+
+    Les élisions sont séparées (« l'école » → « l' », « école »), les mots
+    composés restent entiers (« arc-en-ciel », « aujourd'hui »).
+    """
+    mots = []
+    for mot in _MOT.findall(texte):
+        debut = 0
+        for elision in _ELISION.finditer(mot):
+            if elision.start() != debut:
+                break
+            mots.append(mot[debut:elision.end()])
+            debut = elision.end()
+        if debut < len(mot):
+            mots.append(mot[debut:])
+    return mots
+
+
+def compter_mots(texte):
+    """Compte le nombre de mots dans un texte."""
+    return len(decouper_mots(texte)) if texte else 0
+
+
+class CompteurMots:
+    """Compte les mots d'un texte reçu morceau par morceau.
+
+    Seule la fin du texte, après le dernier espace, est recomptée à chaque
+    ajout : un mot coupé entre deux morceaux n'est compté qu'une fois.
+    """
+
+    def __init__(self):
+        self._mots_complets = 0
+        self._reste = ""
+
+    def ajouter(self, fragment):
+        """Ajoute un morceau de texte et renvoie le total de mots."""
+        tampon = self._reste + fragment
+        coupure = len(tampon)
+        while coupure > 0 and not tampon[coupure - 1].isspace():
+            coupure -= 1
+        self._mots_complets += compter_mots(tampon[:coupure])
+        self._reste = tampon[coupure:]
+        return self.total
+
+    @property
+    def total(self):
+        return self._mots_complets + compter_mots(self._reste)
@@ -0,0 +1,111 @@
+import base64
+import logging
+import os
+from dataclasses import dataclass
+from io import BytesIO
+
+from cache import CacheLRU
+from illustrations import date_modification, image_octets
+from ressources import publier_image
+
+logger = logging.getLogger(__name__)
+
+# Côté de la vignette affichée à côté du titre (pixels CSS)
+TAILLE_VIGNETTE = 50
+
+# Densités produites : écrans ordinaires et écrans haute densité
+DENSITES = (1, 2)
+
+# Vignettes encodées gardées en mémoire, partagées par toutes les sessions
+TAILLE_CACHE = 256
+
+_vignettes = CacheLRU(TAILLE_CACHE)
+
+
+@dataclass(frozen=True)
+class Vignette:
+    """Vignette d'une illustration : adresses (fichiers statiques ou URI data:)
+    de chaque densité, en PNG et, si possible, en WebP."""
+    src: str
+    srcset: str
+    taille: int
+    srcset_webp: str = ""
+
+    def html(self, style=""):
+        """Balise <img> (dans un <picture> si une version WebP existe)."""
+        img = (f'<img src="{self.src}" srcset="{self.srcset}" width="{self.taille}" '
+               f'height="{self.taille}" style="{style}">')
+        if not self.srcset_webp:
+            return img
+        return f'<picture><source type="image/webp" srcset="{self.srcset_webp}">{img}</picture>'
+
+
+def _srcset(adresses):
+    return ", ".join(f"{adresse} {densite}x" for adresse, densite in zip(adresses, DENSITES))
+
+
+def _uri(octets, format_image="png"):
+    return f"data:image/{format_image};base64,{base64.b64encode(octets).decode()}"
+
+
+def reduire(octets, cote):
+    """Recadre l'image au centre et la réduit en carré de cote pixels (PNG)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(octets)) as image:
+        carre = ImageOps.fit(image.convert("RGB"), (cote, cote), Image.LANCZOS)
+    sortie = BytesIO()
+    carre.save(sortie, format="PNG", optimize=True)
+    return sortie.getvalue()
+
+
+def _publier(image_path, reductions, taille):
+    """Publie les réductions dans le dossier statique ; None s'il est inaccessible."""
+    nom = os.path.splitext(os.path.basename(image_path))[0]
+    try:
+        adresses = [
+            publier_image(octets, f"{nom}-{taille * densite}")
+            for octets, densite in zip(reductions, DENSITES)
+        ]
+    except OSError:
+        logger.exception("Dossier statique inaccessible : vignette %s envoyée en ligne", image_path)
+        return None
+    png = [url_png for url_png, _ in adresses]
+    webp = [url_webp for _, url_webp in adresses]
+    return Vignette(png[0], _srcset(png), taille, _srcset(webp) if None not in webp else "")
+
+
+def vignette(image_path, titre, taille=TAILLE_VIGNETTE, statique=False):
+    """Vignette de l'illustration d'un texte, ou None s'il n'y en a pas.
+
+    Les réductions (taille et 2 × taille) sont calculées une fois par
+    fichier, puis servies depuis la mémoire tant que le fichier ne change
+    pas (clé : chemin et date de modification). Avec statique (service des
+    fichiers statiques de Streamlit activé), elles sont publiées à une
+    adresse fixe (voir ressources.py) que le navigateur garde en cache ;
+    sinon, elles sont insérées en URI data:.
+    Si elles ne peuvent pas être calculées, l'image entière est insérée
+    comme avant.
+    """
+    cle = (image_path, date_modification(image_path), taille, statique)
+    resultat = _vignettes.get(cle)
+    if resultat is not None:
+        return resultat
+
+    octets = image_octets(image_path, titre)
+    if octets is None:
+        return None
+    # Le fichier vient peut-être d'être dessiné : sa date fait partie de la clé
+    cle = (image_path, date_modification(image_path), taille, statique)
+    try:
+        reductions = [reduire(octets, taille * densite) for densite in DENSITES]
+    except Exception:
+        logger.exception("Vignette de %s impossible à calculer", image_path)
+        resultat = Vignette(_uri(octets), "", taille)
+    else:
+        resultat = _publier(image_path, reductions, taille) if statique else None
+        if resultat is None:
+            uris = [_uri(reduction) for reduction in reductions]
+            resultat = Vignette(uris[0], _srcset(uris), taille)
+    _vignettes.set(cle, resultat)
+    return resultat